@@ -1,15 +1,17 @@
 # agents/base_agent.py
 import json
 from services.open_router_client import OpenRouterClient
+from services.model_routing import route_for
 import tools.file_system_tools as fs_tools
 import tools.shell_tools as shell_tools
+from services.tracing import span
 
 
 class BaseAgent:
     def __init__(self, name, system_prompt, tools_list=None):
         self.name = name
         self.system_prompt = system_prompt
-        self.client = OpenRouterClient()
+        self.client = OpenRouterClient(route=route_for(name))
         self.available_tools = {}
         self.tool_definitions = []
 
@@ -24,12 +26,19 @@ class BaseAgent:
                     self.tool_definitions.append(
                         shell_tools.execute_shell_tool_def)
 
-    def execute(self, user_prompt):
-        history = [{"role": "system", "content": self.system_prompt}, {
+    def execute(self, user_prompt, on_progress=None, system_prompt=None, tools=None):
+        """
+        Runs one completion and the tool calls it makes. `tools` replaces entries of
+        `available_tools` for this call, e.g. with arguments the model must not choose bound in.
+        """
+        available_tools = dict(self.available_tools, **(tools or {}))
+        history = [{"role": "system", "content": system_prompt or self.system_prompt}, {
             "role": "user", "content": user_prompt}]
-        response = self.client.create_chat_completion(
-            messages=history, tools=self.tool_definitions if self.tool_definitions else None
-        )
+        with span(self.name, category="agent"):
+            response = self.client.create_chat_completion(
+                messages=history, tools=self.tool_definitions if self.tool_definitions else None,
+                on_progress=on_progress
+            )
 
         if not response or not response.get('choices'):
             return {"text": "Agent failed to get a valid response from the API."}
@@ -38,21 +47,29 @@ class BaseAgent:
         tool_calls = response_message.get("tool_calls")
 
         if not tool_calls:
-            return {"text": response_message.get("content")}
+            if self.tool_definitions:
+                # Agents with tools must call one; a text-only reply is not worth replaying from the cache.
+                self.client.reject(response)
+            return {"text": response_message.get("content"), "response": response}
 
         tool_results = []
+        rejected = False
         for tool_call in tool_calls:
             tool_name = tool_call['function']['name']
-            tool_function = self.available_tools.get(tool_name)
+            tool_function = available_tools.get(tool_name)
             if not tool_function:
                 tool_results.append(
                     {"output": f"Error: Tool '{tool_name}' not found."})
+                rejected = True
                 continue
             try:
                 tool_args = json.loads(tool_call['function']['arguments'])
                 tool_output = tool_function(**tool_args)
-                tool_results.append({"output": tool_output})
+                tool_results.append({"output": tool_output, "tool": tool_name, "arguments": tool_args})
             except Exception as e:
                 tool_results.append({"output": f"Error executing tool: {e}"})
+                rejected = True
 
-        return {"tool_results": tool_results}
+        if rejected:
+            self.client.reject(response)
+        return {"tool_results": tool_results, "response": response}
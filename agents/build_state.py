@@ -0,0 +1,98 @@
+# agents/build_state.py
+import hashlib
+import json
+import os
+
+STATE_DIR = ".frontend_agent"
+STATE_FILE = "build_state.json"
+
+
+def normalize_component_path(file_path):
+    """Plan paths are relative to `src/`, but models sometimes include the prefix."""
+    clean = file_path.strip().replace("\\", "/")
+    return clean[len("src/"):] if clean.startswith("src/") else clean
+
+
+def _hash_file(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def load_build_state(project_path):
+    """Returns the state saved by the previous build of `project_path`, or None."""
+    try:
+        with open(os.path.join(project_path, STATE_DIR, STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_build_state(project_path, plan):
+    """Records `plan` and the content hash of every component file it produced."""
+    file_hashes = {}
+    for component in plan.get("components", []):
+        if component.get("file_path"):
+            rel_path = normalize_component_path(component["file_path"])
+            file_hashes[rel_path] = _hash_file(os.path.join(project_path, "src", rel_path))
+    state = {"plan": plan, "file_hashes": file_hashes}
+    os.makedirs(os.path.join(project_path, STATE_DIR), exist_ok=True)
+    with open(os.path.join(project_path, STATE_DIR, STATE_FILE), "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    return state
+
+
+def diff_plan(previous_state, new_plan, project_path):
+    """
+    Compares a freshly planned project against the previous build.
+    A component needs (re)generation when it is new, its description changed, or its
+    file is missing on disk (including when the previous build failed to write it).
+    Files whose content no longer matches the recorded hash were edited by hand and are
+    left alone; they are listed under `edited`.
+    Returns a dict with `components` (to generate), `unchanged`, `edited`, `removed`,
+    `npm_dependencies` and `shadcn_dependencies` (only packages not installed before).
+    """
+    previous_plan = previous_state.get("plan", {})
+    previous_components = {normalize_component_path(c["file_path"]): c
+                           for c in previous_plan.get("components", []) if c.get("file_path")}
+
+    file_hashes = previous_state.get("file_hashes", {})
+    changed, unchanged, edited = [], [], []
+    seen = set()
+    for component in new_plan.get("components", []):
+        if not component.get("file_path"):
+            continue
+        rel_path = normalize_component_path(component["file_path"])
+        seen.add(rel_path)
+        previous = previous_components.get(rel_path)
+        current_hash = _hash_file(os.path.join(project_path, "src", rel_path))
+        same_description = previous and previous.get("description", "").strip() == component.get("description", "").strip()
+        if not same_description or current_hash is None:
+            changed.append(component)
+        elif file_hashes.get(rel_path) not in (None, current_hash):
+            edited.append(component)
+        else:
+            unchanged.append(component)
+
+    def new_packages(key):
+        installed = set(previous_plan.get(key) or [])
+        return [p for p in dict.fromkeys(new_plan.get(key) or []) if p not in installed]
+
+    return {
+        "components": changed,
+        "unchanged": unchanged,
+        "edited": edited,
+        "removed": sorted(set(previous_components) - seen),
+        "npm_dependencies": new_packages("npm_dependencies"),
+        "shadcn_dependencies": new_packages("shadcn_dependencies"),
+    }
+
+
+def merge_plans(previous_plan, new_plan):
+    """The plan to persist after an incremental build: the new plan plus every package installed so far."""
+    merged = dict(new_plan)
+    for key in ("npm_dependencies", "shadcn_dependencies"):
+        merged[key] = list(dict.fromkeys((previous_plan.get(key) or []) + (new_plan.get(key) or [])))
+    return merged
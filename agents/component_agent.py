@@ -1,10 +1,11 @@
 # agents/component_agent.py
+import os
 from agents.base_agent import BaseAgent
+from agents.build_state import normalize_component_path
+from tools.file_system_tools import bind_write_react_component
+from tools.template_index import estimate_tokens, get_template_index
 
-
-class ComponentAgent(BaseAgent):
-    def __init__(self, template_context=""):
-        system_prompt = f"""
+SYSTEM_PROMPT_TEMPLATE = """
 You are a senior React developer AI that writes clean, modern TSX code. You MUST follow the template conventions provided below.
 
 {template_context}
@@ -13,14 +14,62 @@ You are a senior React developer AI that writes clean, modern TSX code. You MUST
 - You MUST use the `write_react_component` tool to output the code.
 - Your ONLY output must be a call to the `write_react_component` tool.
 """
-        super().__init__("ComponentAgent", system_prompt,
+
+BATCH_SYSTEM_PROMPT_TEMPLATE = """
+You are a senior React developer AI that writes clean, modern TSX code. You MUST follow the template conventions provided below.
+
+{template_context}
+---
+- Your task is to write the full code for several React components.
+- You MUST call the `write_react_component` tool once for EVERY file listed, each with that file's complete code.
+- Your ONLY output must be these `write_react_component` tool calls.
+"""
+
+# Rough output size of a generated component: a fixed skeleton plus code that grows with its description.
+BASE_OUTPUT_TOKENS = 350
+OUTPUT_TOKENS_PER_DESCRIPTION_TOKEN = 8
+
+
+def estimate_output_tokens(component_task):
+    """Estimated completion tokens for generating `component_task`, used to size batches."""
+    return BASE_OUTPUT_TOKENS + OUTPUT_TOKENS_PER_DESCRIPTION_TOKEN * estimate_tokens(
+        component_task.get('description', ''))
+
+
+class ComponentAgent(BaseAgent):
+    def __init__(self, template_path=None):
+        # The template guidance is chosen per component from the current index of `template_path`,
+        # which is re-parsed when the file changes; see _execute_for.
+        self.template_path = template_path
+        super().__init__("ComponentAgent", SYSTEM_PROMPT_TEMPLATE.format(template_context=""),
                          tools_list=['write_react_component'])
 
-    def create_component(self, component_task, project_path):
+    def _execute_for(self, component_task, project_path, description, prompt, on_progress,
+                     template=SYSTEM_PROMPT_TEMPLATE):
+        """
+        Runs `prompt` with the template guidance selected for this component. Files are
+        written into `project_path`; the model only chooses the path inside `src/`.
+        """
+        system_prompt = template.format(template_context="")
+        selection = None
+        if self.template_path is not None:
+            template_index = get_template_index(self.template_path)
+            selection = template_index.select(
+                "component", component_task.get('file_path', ''), description)
+            system_prompt = template.format(
+                template_context=template_index.render(selection))
+            print(f"Template context for {component_task.get('file_path')}: {selection.summary()}")
+
+        result = self.execute(prompt, on_progress=on_progress, system_prompt=system_prompt,
+                              tools={'write_react_component': bind_write_react_component(project_path)})
+        if selection is not None:
+            result["context"] = selection
+        return result
+
+    def create_component(self, component_task, project_path, on_progress=None):
         description = component_task.get(
             'description', f"Create a component for {component_task.get('file_path', 'unknown')}.")
         prompt = f"""
-The project is located at '{project_path}'.
 Create the React component as described below, following all template conventions.
 
 File Path: {component_task.get('file_path')}
@@ -28,4 +77,58 @@ Description: {description}
 
 Write the complete code and use the `write_react_component` tool to save it.
 """
-        return self.execute(prompt)
+        return self._execute_for(component_task, project_path, description, prompt, on_progress)
+
+    def create_components(self, component_tasks, project_path, on_progress=None):
+        """
+        Generates several components in one call, asking for one `write_react_component`
+        call per file. `result["written"]` lists the file paths that were written; the
+        caller re-queues the rest.
+        """
+        files = "\n\n".join(
+            f"File Path: {task.get('file_path')}\nDescription: {task.get('description', '')}"
+            for task in component_tasks)
+        prompt = f"""
+Create each of the {len(component_tasks)} React components described below, following all template conventions.
+
+{files}
+
+Write the complete code of every component and call the `write_react_component` tool once per file.
+"""
+        combined = {'file_path': " ".join(task.get('file_path', '') for task in component_tasks)}
+        description = " ".join(task.get('description', '') for task in component_tasks)
+        result = self._execute_for(combined, project_path, description, prompt, on_progress,
+                                   BATCH_SYSTEM_PROMPT_TEMPLATE)
+        result["written"] = [res["arguments"].get("file_path", "") for res in result.get("tool_results", [])
+                             if res.get("tool") == "write_react_component" and res.get("arguments")
+                             and not str(res["output"]).startswith("Error")]
+        return result
+
+    def repair_component(self, component_task, project_path, errors, on_progress=None):
+        """Sends a generated component back with its type-check errors and has it rewritten."""
+        file_path = component_task.get('file_path', '')
+        try:
+            with open(os.path.join(project_path, "src", normalize_component_path(file_path)), "r",
+                      encoding="utf-8") as f:
+                code = f.read()
+        except OSError as e:
+            return {"text": f"Could not read {file_path} for repair: {e}"}
+        description = component_task.get('description', '')
+        error_list = "\n".join(f"- {error}" for error in errors)
+        prompt = f"""
+The component below fails the TypeScript type-check. Fix every error listed, keep its behaviour, and follow all template conventions.
+
+File Path: {file_path}
+Description: {description}
+
+Type errors (line:column code message):
+{error_list}
+
+Current code:
+```tsx
+{code}
+```
+
+Write the complete corrected code and use the `write_react_component` tool to save it.
+"""
+        return self._execute_for(component_task, project_path, description, prompt, on_progress)
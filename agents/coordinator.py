@@ -1,46 +1,74 @@
 # agents/coordinator.py
-from collections import deque
-from agents.planner_agent import PlannerAgent
-from agents.component_agent import ComponentAgent
-from agents.dependency_agent import DependencyAgent
+import re
+from agents.component_agent import estimate_output_tokens
+from agents.runtime import get_runtime
+from agents.scheduler import TaskScheduler
+from agents.build_state import (diff_plan, load_build_state, merge_plans, normalize_component_path,
+                                save_build_state)
 import tools.shell_tools as shell
-from tools.project_scanner import read_directory_structure
+from tools.project_scanner import get_project_index
+from tools.file_writer import get_project_writer
+from tools.type_checker import run_type_check
+from services.tracing import Tracer, span, use_tracer
 import os
 import shutil
-import subprocess
-import atexit
+import collections
+import contextvars
 import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+import config
 
-# ... load_template_context() function is unchanged ...
+# Latest output lines shown while a shell command runs, and the minimum seconds between redraws.
+LOG_TAIL_LINES = 12
+LOG_RENDER_INTERVAL = 0.2
 
 
-def load_template_context():
-    try:
-        with open("template_context.md", "r", encoding="utf-8") as f:
-            return f.read()
-    except FileNotFoundError:
-        print("Warning: template_context.md not found.")
-        return ""
+class _Bootstrap:
+    """A base workspace being created in a staging directory while the plan is made."""
+
+    def __init__(self, path):
+        self.path = path
+        self.tail = collections.deque(maxlen=LOG_TAIL_LINES)
+        self.cancelled = threading.Event()
+        self.future = None  # resolves to an error message, or None on success
+
+    def on_line(self, stream, line):
+        self.tail.append(line)
+
+    def discard(self):
+        """Skips the remaining steps and deletes the staging directory once the current one finishes."""
+        self.cancelled.set()
+        self.future.add_done_callback(lambda _: shutil.rmtree(self.path, ignore_errors=True))
 
 
 class Coordinator:
-    # ... __init__, _cleanup_dev_server, log methods, _create_tsconfig are unchanged ...
-    def __init__(self, streamlit_ui=None):
-        template_context = load_template_context()
-        self.planner = PlannerAgent(template_context=template_context)
-        self.component_agent = ComponentAgent(
-            template_context=template_context)
-        self.dependency_agent = DependencyAgent()
+    def __init__(self, streamlit_ui=None, workspace_root=None, dev_server_port=None, runtime=None):
+        # Agents, template context and pools are shared process-wide; everything below them is per build.
+        self.runtime = runtime or get_runtime()
+        self.planner, self.component_agent, self.dependency_agent = self.runtime.agents()
+        self.snapshots = self.runtime.snapshots
         self.st = streamlit_ui
-        self.task_queue = deque()
+        # Projects are created under `workspace_root` (the working directory by default).
+        self.workspace_root = workspace_root
+        # Preferred port; the dev server manager picks another one when it is taken.
+        self.dev_server_port = dev_server_port or config.DEV_SERVER_PORT
+        self.preview_url = None
+        self.dev_servers = self.runtime.dev_servers
+        self.dev_server = None
+        self.task_queue = []
         self.project_path = ""
-        self.dev_server_process = None
-        atexit.register(self._cleanup_dev_server)
+        self.task_progress = {}
+        self.tracer = Tracer(enabled=False)
+        self.scheduler = None
 
     def _cleanup_dev_server(self):
-        if self.dev_server_process:
+        if self.dev_server:
             self.log("Shutting down the Vite dev server.")
-            self.dev_server_process.terminate()
+            self.dev_servers.stop(self.dev_server.project_path)
+            self.dev_server = None
 
     def log(self, message): print(message); self.st.info(message)
     def log_success(self, message): print(message); self.st.success(message)
@@ -50,7 +78,7 @@ class Coordinator:
         tsconfig_content = {"compilerOptions": {"target": "ES2020", "useDefineForClassFields": True, "lib": ["ES2020", "DOM", "DOM.Iterable"], "module": "ESNext", "skipLibCheck": True, "moduleResolution": "bundler", "allowImportingTsExtensions": True, "resolveJsonModule": True,
                                                 "isolatedModules": True, "noEmit": True, "jsx": "react-jsx", "strict": True, "noUnusedLocals": True, "noUnusedParameters": True, "noFallthroughCasesInSwitch": True, "baseUrl": ".", "paths": {"@/*": ["./src/*"]}}, "include": ["src"], "references": [{"path": "./tsconfig.node.json"}]}
         try:
-            with open(os.path.join(project_path, "tsconfig.json"), "w") as f:
+            with span("tsconfig"), open(os.path.join(project_path, "tsconfig.json"), "w") as f:
                 json.dump(tsconfig_content, f, indent=2)
             self.log_success(
                 "Successfully created tsconfig.json for path aliases.")
@@ -59,24 +87,110 @@ class Coordinator:
             self.log_error(f"Failed to create tsconfig.json: {e}")
             return False
 
-    def run_frontend_build(self, user_request, base_repo_url):
-        self.log("Step 1: Creating a high-level plan...")
-        initial_context = f'User\'s Request: "{user_request}"\n\n(This is a new project.)'
-        plan = self.planner.create_plan(initial_context)
+    def _report_cache_stats(self, before):
+        after = self.planner.client.cache.stats()
+        hits = after["hits"] - before["hits"]
+        misses = after["misses"] - before["misses"]
+        if hits or misses:
+            saved = after["saved_seconds"] - before["saved_seconds"]
+            self.st.caption(
+                f"LLM cache: {hits} hit(s), {misses} miss(es), ~{saved:.1f}s of API latency saved.")
 
-        if not plan or not all(k in plan for k in ["codename", "components"]):
+    def _report_rate_limits(self, before):
+        after = self.planner.client.rate_limiter.totals()
+        queued = after["queued"] - before["queued"]
+        rate_limited = after["rate_limited"] - before["rate_limited"]
+        if queued or rate_limited:
+            waited = after["wait_seconds"] - before["wait_seconds"]
+            self.st.caption(f"Rate limits: {queued} LLM call(s) queued for {waited:.1f}s in total, "
+                            f"{rate_limited} rejected with 429.")
+
+    def _report_trace(self):
+        """Shows where the build's time went and saves the trace for chrome://tracing or Perfetto."""
+        if not self.tracer.enabled:
+            return
+        trace_path = os.path.join(
+            config.TRACE_DIR, f"{os.path.basename(self.project_path) or 'build'}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        try:
+            self.tracer.export(trace_path, keep=config.TRACE_KEEP)
+        except OSError as e:
+            print(f"Warning: could not write trace file: {e}")
+            trace_path = None
+        with self.st.expander("Build timings", expanded=False):
+            self.st.table(self.tracer.summary())
+            if trace_path:
+                self.st.caption(
+                    f"Chrome trace saved to `{trace_path}` (open in chrome://tracing or ui.perfetto.dev).")
+                with open(trace_path, "r", encoding="utf-8") as f:
+                    self.st.download_button("Download trace", f.read(),
+                                            file_name=os.path.basename(trace_path), mime="application/json")
+
+    def _project_dir(self, codename):
+        return os.path.join(self.workspace_root, codename) if self.workspace_root else codename
+
+    def run_frontend_build(self, user_request, base_repo_url, codename=None):
+        """
+        Builds a new project, or, when `codename` names a previously built project,
+        incrementally applies `user_request` to it. Returns True once the dev server is started.
+        """
+        if codename and not re.fullmatch(r"[\w-]+", codename):
+            self.log_error(f"Invalid project codename '{codename}'.")
+            return False
+        cache_stats = self.planner.client.cache.stats()
+        rate_totals = self.planner.client.rate_limiter.totals()
+        self.tracer = Tracer(enabled=config.TRACE_ENABLED, name=codename or "build")
+        try:
+            with use_tracer(self.tracer), self.tracer.span("build"):
+                if codename and load_build_state(self._project_dir(codename)):
+                    return self._run_incremental_build(user_request, codename)
+                if codename:
+                    self.log(
+                        f"No previous build found for '{codename}'; building a new project under that name.")
+                return self._run_frontend_build(user_request, base_repo_url, codename)
+        finally:
+            self._report_cache_stats(cache_stats)
+            self._report_rate_limits(rate_totals)
+            self._report_trace()
+
+    def _run_incremental_build(self, user_request, codename):
+        self.project_path = self._project_dir(codename)
+        previous_state = load_build_state(self.project_path)
+        previous_plan = previous_state["plan"]
+
+        self.log(f"Step 1: Planning changes to '{codename}'...")
+        with span("planning", incremental=True):
+            plan = self.planner.create_update_plan(
+                user_request, previous_plan,
+                get_project_index(self.project_path).render_tree(
+                    "src", token_budget=config.PROJECT_TREE_TOKEN_BUDGET))
+        if not plan or "components" not in plan:
             self.log_error("Failed to create a valid plan.")
             self.st.json(plan or {"error": "No plan returned."})
-            return
+            return False
+        plan["codename"] = codename
 
-        self.project_path = plan.get("codename", "generated_project")
-        self.st.success(
-            f"Plan created! Project codename: '{self.project_path}'")
-        self.st.json(plan)
+        diff = diff_plan(previous_state, plan, self.project_path)
+        self.st.json({
+            "regenerate": [c["file_path"] for c in diff["components"]],
+            "unchanged": [c["file_path"] for c in diff["unchanged"]],
+            "kept_manual_edits": [c["file_path"] for c in diff["edited"]],
+            "no_longer_planned": diff["removed"],
+            "new_npm_dependencies": diff["npm_dependencies"],
+            "new_shadcn_dependencies": diff["shadcn_dependencies"],
+        })
 
-        if not self.initialize_project(base_repo_url):
-            return
+        self.log("Step 2: Reusing the existing workspace.")
+        self._enqueue_plan(diff)
+        if self.task_queue:
+            self.process_task_queue()
+            self.validate_and_repair(diff["components"])
+        else:
+            self.log_success("Nothing to rebuild; the project is already up to date.")
+        save_build_state(self.project_path, merge_plans(previous_plan, plan))
+        get_project_index(self.project_path)  # refreshes and persists the index for the next update
+        return self.finalize_and_run_project()
 
+    def _enqueue_plan(self, plan):
         if plan.get("npm_dependencies"):
             self.task_queue.append(
                 {"type": "npm_dependencies", "payload": plan["npm_dependencies"]})
@@ -88,76 +202,457 @@ class Coordinator:
                 self.task_queue.append(
                     {"type": "component", "payload": component})
 
+    def _run_frontend_build(self, user_request, base_repo_url, codename=None):
+        # The workspace does not depend on the plan, so it is created while the planner runs.
+        bootstrap = self._start_bootstrap(base_repo_url)
+        try:
+            self.log("Step 1: Creating a high-level plan (preparing the workspace in the background)...")
+            initial_context = f'User\'s Request: "{user_request}"\n\n(This is a new project.)'
+            with span("planning"):
+                plan = self.planner.create_plan(initial_context)
+
+            if not plan or not all(k in plan for k in ["codename", "components"]):
+                self.log_error("Failed to create a valid plan.")
+                self.st.json(plan or {"error": "No plan returned."})
+                return False
+            if codename:
+                # The caller's codename wins, so a later update with it finds this project.
+                plan["codename"] = codename
+
+            self.project_path = self._project_dir(plan.get("codename", "generated_project"))
+            self.st.success(
+                f"Plan created! Project codename: '{plan.get('codename', 'generated_project')}'")
+            self.st.json(plan)
+
+            if not self.initialize_project(bootstrap):
+                return False
+        finally:
+            # No-op once the workspace was moved into place; otherwise cleans up after planning failed.
+            bootstrap.discard()
+
+        self._enqueue_plan(plan)
         self.process_task_queue()
-        self.finalize_and_run_project()
+        self.validate_and_repair(plan["components"])
+        save_build_state(self.project_path, plan)
+        get_project_index(self.project_path)  # refreshes and persists the index for the next update
+        return self.finalize_and_run_project()
+
+    def _start_bootstrap(self, base_repo_url):
+        bootstrap = _Bootstrap(self._project_dir(f".bootstrap-{uuid.uuid4().hex[:8]}"))
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bootstrap")
+        # The copied context keeps the bootstrap's spans in this build's trace.
+        bootstrap.future = executor.submit(
+            contextvars.copy_context().run, self._bootstrap_workspace, bootstrap, base_repo_url)
+        executor.shutdown(wait=False)
+        return bootstrap
+
+    def _bootstrap_workspace(self, bootstrap, base_repo_url):
+        """
+        Creates the base workspace in `bootstrap.path`. Runs on a background thread, so it
+        only prints; returns an error message for the UI thread, or None on success.
+        """
+        path = bootstrap.path
+        try:
+            if config.USE_TEMPLATE_SNAPSHOTS:
+                with span("workspace", snapshot=True):
+                    created = self.snapshots.create_workspace(base_repo_url, path)
+                return None if created else "Failed to create the project from a template snapshot."
+
+            os.makedirs(path)
+            with span("clone"):
+                cloned = shell.run_command(["git", "clone", base_repo_url, "."], cwd=path, on_line=bootstrap.on_line)
+            if not cloned.ok:
+                return f"Failed to clone base repo: {self._describe_failure(cloned)}"
+            if bootstrap.cancelled.is_set():
+                return "Workspace bootstrap cancelled."
+            with span("install", kind="base"):
+                installed = shell.run_command(["pnpm", "install"], cwd=path, on_line=bootstrap.on_line)
+            if not installed.ok:
+                return f"Failed to install base dependencies: {self._describe_failure(installed)}"
+            return None
+        except Exception as e:
+            return f"Failed to prepare the workspace: {e}"
 
-    def initialize_project(self, base_repo_url):
+    def initialize_project(self, bootstrap):
+        """Waits for the background bootstrap and moves its workspace to the project directory."""
         self.log(f"Step 2: Initializing project '{self.project_path}'...")
+        placeholder = self.st.empty()
+        while not wait([bootstrap.future], timeout=LOG_RENDER_INTERVAL).done:
+            if bootstrap.tail:
+                placeholder.code("\n".join(list(bootstrap.tail)), language="bash")
+        if bootstrap.tail:
+            placeholder.code("\n".join(bootstrap.tail), language="bash")
+        error = bootstrap.future.result()
+        if error:
+            self.log_error(error)
+            return False
+
         if os.path.exists(self.project_path):
+            # A new build under an existing codename replaces the old project and its preview.
+            self.dev_servers.stop(self.project_path)
             shutil.rmtree(self.project_path)
-        os.makedirs(self.project_path)
-        if "Error" in shell.execute_shell_command(f"git clone {base_repo_url} .", cwd_override=self.project_path):
-            self.log_error("Failed to clone base repo.")
+        try:
+            os.replace(bootstrap.path, self.project_path)
+        except OSError as e:
+            self.log_error(f"Failed to move the workspace into place: {e}")
             return False
         if not self._create_tsconfig(self.project_path):
             return False
-        if "Error" in shell.execute_shell_command("pnpm install", cwd_override=self.project_path):
-            self.log_error("Failed to install base dependencies.")
-            return False
         self.log_success("Project initialized successfully.")
         return True
 
+    @staticmethod
+    def _describe_failure(result):
+        if result.error:
+            return result.error
+        if result.timed_out:
+            return f"timed out after {result.duration:.0f}s ({result.timed_out} timeout)"
+        return f"exit code {result.exit_code} after {result.duration:.0f}s"
+
+    @staticmethod
+    def _component_name(file_path):
+        return os.path.splitext(os.path.basename(file_path))[0]
+
+    def _build_task_graph(self):
+        """
+        Turns the queued tasks into scheduler entries with ordering constraints:
+        - shadcn installs wait for npm installs (both mutate package.json/node_modules),
+        - a component waits for the components its description refers to by name,
+        - App.tsx waits for every other task, installs included.
+        Small components without dependencies are generated in batches, see _plan_batches.
+        """
+        scheduler = TaskScheduler(max_workers=config.MAX_CONCURRENT_TASKS)
+        install_ids = []
+        components = {}
+
+        for task in self.task_queue:
+            if task["type"] in ("npm_dependencies", "shadcn_dependencies"):
+                task_id = task["type"]
+                depends_on = list(install_ids)
+                scheduler.add_task(task_id, self._make_task_runner(task), depends_on,
+                                   task["type"], task["payload"], background=True)
+                install_ids.append(task_id)
+            elif task["type"] == "component":
+                file_path = task["payload"].get("file_path")
+                if not file_path:
+                    self.log_error(
+                        f"Component missing file_path: {task['payload']}")
+                    continue
+                components[f"component:{file_path}"] = task
+
+        # Edges between components are inferred from the plan descriptions and only
+        # added when they cannot close a cycle.
+        edges = {task_id: set() for task_id in components}
+
+        def reaches(src, dst):
+            stack, seen = [src], set()
+            while stack:
+                node = stack.pop()
+                if node == dst:
+                    return True
+                if node not in seen:
+                    seen.add(node)
+                    stack.extend(edges[node])
+            return False
+
+        entry_ids = {task_id for task_id, task in components.items()
+                     if self._component_name(task["payload"]["file_path"]) == "App"}
+        for task_id, task in components.items():
+            if task_id in entry_ids:
+                continue
+            description = task["payload"].get("description", "")
+            for other_id, other in components.items():
+                if other_id == task_id or other_id in entry_ids:
+                    continue
+                name = self._component_name(other["payload"]["file_path"])
+                if re.search(rf"\b{re.escape(name)}\b", description) and not reaches(other_id, task_id):
+                    edges[task_id].add(other_id)
+
+        batches = self._plan_batches(components, edges, entry_ids)
+        batch_of = {member: batch_id for batch_id, members in batches.items() for member in members}
+        for batch_id, members in batches.items():
+            batch = {"type": "component_batch", "payload": [components[m]["payload"] for m in members]}
+            scheduler.add_task(batch_id, self._make_task_runner(batch), [], batch["type"], batch["payload"])
+        for task_id, task in components.items():
+            if task_id in batch_of:
+                continue
+            depends_on = set(edges[task_id])
+            if task_id in entry_ids:
+                depends_on |= (components.keys() - entry_ids)
+                depends_on |= set(install_ids)
+            scheduler.add_task(task_id, self._make_task_runner(task), {batch_of.get(d, d) for d in depends_on},
+                               task["type"], task["payload"])
+        return scheduler
+
+    @staticmethod
+    def _plan_batches(components, edges, entry_ids):
+        """
+        Groups small components that depend on no other component and live in the same
+        directory, in plan order, into batches of at most COMPONENT_BATCH_MAX_FILES files and
+        COMPONENT_BATCH_MAX_TOKENS estimated output tokens. Batches are kept small enough to
+        still fill MAX_CONCURRENT_TASKS workers, as one call writes its files one after another.
+        Components estimated at more than half the budget get a call of their own.
+        Returns {batch task id: [component task ids]}.
+        """
+        if not config.COMPONENT_BATCHING or config.COMPONENT_BATCH_MAX_FILES < 2:
+            return {}
+        by_directory = {}
+        for task_id, task in components.items():
+            tokens = estimate_output_tokens(task["payload"])
+            if task_id in entry_ids or edges[task_id] or tokens > config.COMPONENT_BATCH_MAX_TOKENS // 2:
+                continue
+            directory = os.path.dirname(normalize_component_path(task["payload"]["file_path"]))
+            by_directory.setdefault(directory, []).append((task_id, tokens))
+
+        batchable = sum(len(members) for members in by_directory.values())
+        max_files = min(config.COMPONENT_BATCH_MAX_FILES, -(-batchable // max(1, config.MAX_CONCURRENT_TASKS)))
+        if max_files < 2:
+            return {}
+        batches = {}
+        for members in by_directory.values():
+            groups, current, used = [], [], 0
+            for task_id, tokens in members:
+                if current and (len(current) == max_files
+                                or used + tokens > config.COMPONENT_BATCH_MAX_TOKENS):
+                    groups.append(current)
+                    current, used = [], 0
+                current.append(task_id)
+                used += tokens
+            groups.append(current)
+            for group in groups:
+                if len(group) > 1:
+                    payload = [components[task_id]["payload"] for task_id in group]
+                    batches[Coordinator._task_id({"type": "component_batch", "payload": payload})] = group
+        return batches
+
+    @staticmethod
+    def _task_id(task):
+        if task["type"] == "component_batch":
+            return "component_batch:" + ",".join(c["file_path"] for c in task["payload"])
+        return f"{task['type']}:{task['payload'].get('file_path')}"
+
+    def _requeue_missing(self, scheduler, task):
+        """Re-queues the files a batched call did not write as single-component tasks."""
+        written = {normalize_component_path(path) for path in (task.result or {}).get("written", [])}
+        missing = [c for c in task.payload if normalize_component_path(c["file_path"]) not in written]
+        if not missing:
+            return
+        self.log(f"{len(missing)} of {len(task.payload)} batched components were not written; "
+                 f"re-queueing {', '.join(c['file_path'] for c in missing)}.")
+        dependents = [t.id for t in scheduler.tasks.values() if task.id in t.depends_on and t.started_at is None]
+        for component in missing:
+            retry = {"type": "component", "payload": component}
+            retry_id = self._task_id(retry)
+            scheduler.add_task(retry_id, self._make_task_runner(retry), [], retry["type"], component)
+            for dependent in dependents:
+                scheduler.add_dependency(dependent, retry_id)
+
+    def _make_task_runner(self, task):
+        """Returns a zero-argument callable that runs `task` on a worker thread. No UI calls in here."""
+        if task["type"] in ("npm_dependencies", "shadcn_dependencies"):
+            def on_line(stream, line):
+                self.task_progress[task["type"]] = {"line": line}
+
+            def run_install():
+                with span("install", kind=task["type"], packages=len(task["payload"])):
+                    return self.dependency_agent.install_packages(task["type"], task["payload"], self.project_path,
+                                                                  on_line=on_line)
+            return run_install
+        task_id = self._task_id(task)
+
+        def on_progress(event):
+            # Plain dict assignment from the worker thread; the UI thread renders it in _render_progress.
+            self.task_progress[task_id] = event
+
+        if task["type"] == "repair":
+            def run_repair():
+                with span("repair", file_path=task["payload"].get("file_path"),
+                          errors=len(task["payload"]["errors"])):
+                    return self.component_agent.repair_component(task["payload"], self.project_path,
+                                                                 task["payload"]["errors"], on_progress=on_progress)
+            return run_repair
+
+        if task["type"] == "component_batch":
+            def run_batch():
+                with span("component_batch", files=len(task["payload"])):
+                    return self.component_agent.create_components(task["payload"], self.project_path,
+                                                                  on_progress=on_progress)
+            return run_batch
+
+        def run_component():
+            with span("component", file_path=task["payload"].get("file_path")):
+                return self.component_agent.create_component(task["payload"], self.project_path,
+                                                             on_progress=on_progress)
+        return run_component
+
+    @staticmethod
+    def _format_progress(event):
+        if "line" in event:
+            return f"`{event['line'][:120]}`" if event["line"].strip() else "running..."
+        ttft = f"{event['ttft']:.1f}s" if event.get("ttft") is not None else "waiting"
+        retry = f", attempt {event['attempt']}" if event.get("attempt", 1) > 1 else ""
+        return f"~{event['tokens']} tokens in {event['elapsed']:.1f}s (first token: {ttft}{retry})"
+
+    @staticmethod
+    def _task_label(task):
+        if task.type == "component_batch":
+            return ", ".join(c["file_path"] for c in task.payload)
+        return task.payload.get("file_path") if task.type in ("component", "repair") else task.type
+
+    def _render_progress(self, scheduler, placeholder):
+        """Shows every in-flight task and its streaming progress. Called on the UI thread."""
+        lines = []
+        for task in scheduler.tasks.values():
+            if task.started_at is None or task.finished_at is not None:
+                continue
+            label = self._task_label(task)
+            event = self.task_progress.get(task.id)
+            lines.append(f"- ⏳ `{label}`: {self._format_progress(event) if event else 'running...'}")
+        placeholder.markdown("\n".join(lines) or "Waiting for tasks...")
+
+    def _report_task(self, task):
+        """Renders a finished task in the UI. Always called from the Streamlit script thread."""
+        label = self._task_label(task)
+        with self.st.expander(f"Task: {label} ({task.duration:.1f}s)", expanded=True):
+            if task.error:
+                self.log_error(f"Task '{task.id}' raised an exception: {task.error}")
+                return
+            result = task.result or {}
+            if task.type in ("npm_dependencies", "shadcn_dependencies"):
+                if result.get("command"):
+                    self.st.caption(f"Ran `{result['command']}` directly (no LLM call).")
+                if result.get("tool_results"):
+                    [self.st.code(res["output"], language="bash")
+                     for res in result["tool_results"]]
+                kind = "NPM" if task.type == "npm_dependencies" else "ShadCN"
+                if result.get("result") and not result["result"].ok:
+                    self.log_error(f"{kind} installation failed: {self._describe_failure(result['result'])}")
+                else:
+                    self.log_success(f"Finished {kind} installation.")
+            elif result.get("tool_results"):
+                if task.id in self.task_progress:
+                    self.st.caption(self._format_progress(self.task_progress[task.id]))
+                if result.get("context"):
+                    self.st.caption(f"Template context: {result['context'].summary()}")
+                [self.log_success(res["output"])
+                 for res in result["tool_results"]]
+            else:
+                self.log_error(f"Component agent failed for {label}")
+
+    def _report_flush(self, outcome):
+        written = sum(1 for status in outcome.values() if status == "written")
+        unchanged = sum(1 for status in outcome.values() if status == "unchanged")
+        for path, status in outcome.items():
+            if status not in ("written", "unchanged"):
+                self.log_error(f"src/{path}: {status}")
+        if unchanged:
+            self.st.caption(f"Wrote {written} file(s); {unchanged} unchanged file(s) were left as they were.")
+
     def process_task_queue(self):
         self.log("Step 3: Processing task queue...")
-        while self.task_queue:
-            task = self.task_queue.popleft()
-
-            with self.st.expander(f"Task: {task['type']}", expanded=True):
-                # --- START: FIX ---
-                if task["type"] == "npm_dependencies":
-                    prompt = "Please install the following npm packages by creating a single `pnpm add` command."
-                    result = self.dependency_agent.install(
-                        task["payload"], self.project_path, prompt)
-                    if result.get("tool_results"):
-                        [self.st.code(res["output"], language="bash")
-                         for res in result["tool_results"]]
-                    self.log_success("Finished NPM installation.")
-
-                elif task["type"] == "shadcn_dependencies":
-                    prompt = "Please add the following shadcn-ui components by creating a single `pnpm dlx shadcn-ui@latest add ... --y --overwrite` command."
-                    result = self.dependency_agent.install(
-                        task["payload"], self.project_path, prompt)
-                    if result.get("tool_results"):
-                        [self.st.code(res["output"], language="bash")
-                         for res in result["tool_results"]]
-                    self.log_success("Finished ShadCN installation.")
-                # --- END: FIX ---
-
-                elif task["type"] == "component":
-                    component_name = task['payload'].get('file_path', 'Unknown Component')
-                    if not task['payload'].get('file_path'):
-                        self.log_error(f"Component missing file_path: {task['payload']}")
-                        continue
-                    
-                    self.st.write(f"Creating Component: {component_name}")
-                    result = self.component_agent.create_component(
-                        task["payload"], self.project_path)
-                    if result.get("tool_results"):
-                        [self.log_success(res["output"])
-                         for res in result["tool_results"]]
-                    else:
-                        self.log_error(
-                            f"Component agent failed for {task['payload'].get('file_path')}")
+        try:
+            scheduler = self._build_task_graph()
+        except ValueError as e:
+            self.log_error(f"Invalid task graph: {e}")
+            return
+        self.task_queue = []
+        self.scheduler = scheduler
+        self.log(
+            f"Running {len(scheduler.tasks)} tasks with up to {scheduler.max_workers} in parallel.")
+        with self.st.expander("Live progress", expanded=True):
+            placeholder = self.st.empty()
+
+        def on_complete(task):
+            self._report_task(task)
+            if task.type == "component_batch":
+                self._requeue_missing(scheduler, task)
+
+        # Generated files are flushed together once all tasks finished: one rebuild for a running dev server.
+        with get_project_writer(self.project_path).batch() as flushed:
+            scheduler.run(on_complete=on_complete, on_tick=lambda: self._render_progress(scheduler, placeholder))
+        placeholder.markdown("All tasks finished.")
+        self._report_flush(flushed)
+        self.task_progress = {}
         self.log_success("✅ All components created!")
 
+    def validate_and_repair(self, components):
+        """
+        Type-checks the whole project in one incremental `tsc` pass and sends the files with
+        errors back to the ComponentAgent, for at most TYPECHECK_MAX_REPAIR_ROUNDS rounds.
+        Only `components` (the plan entries generated by this build) are repaired.
+        """
+        if not config.TYPECHECK_ENABLED or not components:
+            return
+        self.log("Step 4: Type-checking generated components...")
+        generated = {f"src/{normalize_component_path(c['file_path'])}": c
+                     for c in components if c.get("file_path")}
+        for round_number in range(config.TYPECHECK_MAX_REPAIR_ROUNDS + 1):
+            with span("typecheck", round=round_number) as trace:
+                check = run_type_check(self.project_path)
+                trace.set(errors=check.error_count)
+            if check.error:
+                self.log_error("Type-check could not run; skipping validation.")
+                self.st.code(check.error, language="bash")
+                return
+            failing = {path: errors for path, errors in check.diagnostics.items() if path in generated}
+            if not failing:
+                others = check.error_count
+                note = f" ({others} errors in files not generated by this build)" if others else ""
+                self.log_success(f"Type-check passed in {check.duration:.1f}s{note}.")
+                return
+            error_count = sum(len(errors) for errors in failing.values())
+            if round_number == config.TYPECHECK_MAX_REPAIR_ROUNDS:
+                self.log_error(f"{error_count} type errors remain in {len(failing)} files after "
+                               f"{round_number} repair rounds.")
+                with self.st.expander("Remaining type errors"):
+                    for path, errors in failing.items():
+                        self.st.code(f"{path}\n" + "\n".join(errors), language="text")
+                return
+            self.log(f"Type-check round {round_number + 1}: {error_count} errors in {len(failing)} files "
+                     f"({check.duration:.1f}s); sending them back for repair.")
+            self._run_repairs({path: dict(generated[path], errors=errors) for path, errors in failing.items()})
+
+    def _run_repairs(self, payloads):
+        scheduler = TaskScheduler(max_workers=config.MAX_CONCURRENT_TASKS)
+        for path, payload in payloads.items():
+            task = {"type": "repair", "payload": payload}
+            scheduler.add_task(f"repair:{payload['file_path']}", self._make_task_runner(task), [],
+                               "repair", payload)
+        with self.st.expander("Repair progress", expanded=True):
+            placeholder = self.st.empty()
+        with get_project_writer(self.project_path).batch() as flushed:
+            scheduler.run(on_complete=self._report_task,
+                          on_tick=lambda: self._render_progress(scheduler, placeholder))
+        placeholder.markdown("All repairs finished.")
+        self._report_flush(flushed)
+        self.task_progress = {}
+
     def finalize_and_run_project(self):
-        self.log("Step 4: Starting the Vite dev server...")
+        self.log("Step 5: Starting the Vite dev server...")
         try:
-            self.dev_server_process = subprocess.Popen(["pnpm", "run", "dev"], cwd=self.project_path,
-                                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            self.log_success("Vite dev server is starting...")
-            self.st.balloons()
-            self.st.markdown(
-                f"🎉 **Build Complete!** Your project **'{self.project_path}'** is running. [**Click here to preview**](http://localhost:5173)")
+            with span("dev_server") as trace:
+                server, reused = self.dev_servers.ensure(self.project_path, port=self.dev_server_port)
+                trace.set(reused=reused, port=server.port if server else None,
+                          time_to_ready=server.time_to_ready if server else None)
         except Exception as e:
             self.log_error(f"Failed to start dev server: {e}")
+            return False
+        if server is None:
+            self.log_error("Failed to start dev server: no free port.")
+            return False
+        if not server.ready:
+            self.log_error("The Vite dev server did not become ready.")
+            self.st.code("\n".join(server.log) or "(no output)", language="bash")
+            self.dev_servers.stop(self.project_path)
+            return False
+
+        self.dev_server = server
+        self.preview_url = server.url
+        if reused:
+            self.log_success(f"Reusing the running dev server at {server.url}; changed files are hot-reloaded.")
+        else:
+            self.log_success(f"Vite dev server ready at {server.url} in {server.time_to_ready:.1f}s.")
+        self.st.balloons()
+        self.st.markdown(
+            f"🎉 **Build Complete!** Your project **'{self.project_path}'** is running. [**Click here to preview**]({self.preview_url})")
+        return True
@@ -1,5 +1,56 @@
 # agents/dependency_agent.py
+import re
+import shlex
 from agents.base_agent import BaseAgent
+import tools.shell_tools as shell_tools
+
+# npm package names (optionally scoped) with an optional version/range/tag after "@".
+NPM_PACKAGE_RE = re.compile(
+    r"^(@[a-z0-9][a-z0-9._~-]*/)?[a-z0-9][a-z0-9._~-]*(@[A-Za-z0-9._~^<>=*|+ -]+)?$")
+SHADCN_COMPONENT_RE = re.compile(r"^[a-z][a-z0-9-]*$")
+
+INSTALL_COMMANDS = {
+    "npm_dependencies": "pnpm add {packages}",
+    "shadcn_dependencies": "pnpm dlx shadcn-ui@latest add {packages} --yes --overwrite",
+}
+
+FALLBACK_PROMPTS = {
+    "npm_dependencies": "Please install the following npm packages by creating a single `pnpm add` command.",
+    "shadcn_dependencies": "Please add the following shadcn-ui components by creating a single `pnpm dlx shadcn-ui@latest add ... --y --overwrite` command.",
+}
+
+
+def normalize_packages(kind, packages):
+    """
+    Cleans up and de-duplicates package names for an install of `kind`.
+    Returns `(valid, invalid)`, both in their original order.
+    """
+    valid, invalid = [], []
+    for package in packages or []:
+        name = str(package).strip()
+        if kind == "shadcn_dependencies":
+            # Plans sometimes use import paths or display names ("@/components/ui/button", "Alert Dialog").
+            name = name.split("/")[-1].lower().replace(" ", "-")
+            pattern = SHADCN_COMPONENT_RE
+        else:
+            pattern = NPM_PACKAGE_RE
+        if not name:
+            continue
+        if pattern.match(name):
+            if name not in valid:
+                valid.append(name)
+        else:
+            invalid.append(name)
+    return valid, invalid
+
+
+def build_install_command(kind, packages):
+    """Returns the shell command installing `packages`, or None if it can't be built deterministically."""
+    template = INSTALL_COMMANDS.get(kind)
+    valid, invalid = normalize_packages(kind, packages)
+    if template is None or invalid or not valid:
+        return None
+    return template.format(packages=" ".join(shlex.quote(p) for p in valid))
 
 
 class DependencyAgent(BaseAgent):
@@ -14,6 +65,26 @@ You are a dependency management expert for a Vite+React project using pnpm.
         super().__init__("DependencyAgent", system_prompt,
                          tools_list=['execute_shell_command'])
 
+    def install_packages(self, kind, dependencies, project_path, on_line=None):
+        """
+        Installs `dependencies` of `kind` ("npm_dependencies" or "shadcn_dependencies").
+        Known kinds with well-formed package names are installed directly without an LLM
+        call, streaming output lines to `on_line(stream, line)`; anything else falls back
+        to the agent.
+        """
+        command = build_install_command(kind, dependencies)
+        if command:
+            result = shell_tools.run_command(command, cwd=project_path, on_line=on_line)
+            return {"tool_results": [{"output": str(result)}], "command": command, "result": result}
+
+        valid, invalid = normalize_packages(kind, dependencies)
+        if not valid and not invalid:
+            return {"text": "No dependencies to install."}
+        print(f"DependencyAgent: falling back to the LLM for {kind} (unrecognized: {invalid or 'install type'})")
+        prompt = FALLBACK_PROMPTS.get(
+            kind, f"Please install the following {kind} by creating a single shell command.")
+        return self.install(dependencies, project_path, prompt)
+
     def install(self, dependencies, project_path, install_command_prompt):
         """
         A generic method to install a list of dependencies.
@@ -24,8 +24,28 @@ Your output MUST be ONLY the raw JSON object.
 """
         super().__init__("PlannerAgent", system_prompt)
 
+    def create_update_plan(self, user_request, previous_plan, project_structure=""):
+        """Plans a change to an existing project, keeping everything that does not need to change."""
+        context = f"""User's Request: "{user_request}"
+
+(This is an UPDATE to an existing project.)
+The project was built from this plan:
+{json.dumps(previous_plan, indent=2)}
+
+Current files in `src`:
+{project_structure}
+
+Return the complete, updated plan:
+- Keep the codename "{previous_plan.get('codename')}".
+- Copy every component that does not need to change EXACTLY as it appears above, including its description.
+- Only change the description of components whose code must change, and add new components as needed.
+- Only list npm and shadcn-ui dependencies that are not already in the plan above.
+"""
+        return self.create_plan(context)
+
     def create_plan(self, user_request_with_context):
-        plan_str = self.execute(user_request_with_context).get("text", "")
+        result = self.execute(user_request_with_context)
+        plan_str = result.get("text") or ""
         try:
             clean_str = plan_str.strip().removeprefix(
                 "```json").removesuffix("```").strip()
@@ -44,4 +64,5 @@ Your output MUST be ONLY the raw JSON object.
         except json.JSONDecodeError:
             print(
                 f"--- Planner Agent Failed to produce valid JSON ---\n{plan_str}")
+            self.client.reject(result.get("response"))
             return None
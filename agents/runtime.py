@@ -0,0 +1,102 @@
+# agents/runtime.py
+import atexit
+import sys
+import threading
+import time
+
+TEMPLATE_PATH = "template_context.md"
+
+
+class AgentRuntime:
+    """
+    Process-wide state shared by every build and Streamlit session: the parsed template
+    context, the three agents (they keep no per-build state, so concurrent builds share
+    them) and through them the pooled HTTP transport and response cache, plus the dev
+    server manager and the build service. Per-build state (workspace, task queue, dev
+    server of the project) stays on the Coordinator. Modules behind these objects are
+    imported on first use, so a Streamlit rerun that only polls job status never loads them.
+    """
+
+    def __init__(self, template_path=TEMPLATE_PATH):
+        self.template_path = template_path
+        self._template_index = None
+        self._agents = None
+        self._build_service = None
+        self._lock = threading.Lock()
+
+    @property
+    def template_index(self):
+        from tools.template_index import get_template_index
+        return get_template_index(self.template_path)
+
+    def agents(self):
+        """
+        Returns `(planner, component_agent, dependency_agent)`. They are created once and
+        rebuilt when the template context file changes, because the planner's context is
+        rendered at creation; the component agent reads the current index on every call.
+        """
+        template_index = self.template_index
+        with self._lock:
+            if self._agents is None or self._template_index is not template_index:
+                from agents.planner_agent import PlannerAgent
+                from agents.component_agent import ComponentAgent
+                from agents.dependency_agent import DependencyAgent
+                started = time.perf_counter()
+                self._agents = (
+                    PlannerAgent(template_context=template_index.render(template_index.select("planner"))),
+                    ComponentAgent(template_path=self.template_path),
+                    DependencyAgent(),
+                )
+                self._template_index = template_index
+                print(f"Agents created in {(time.perf_counter() - started) * 1000:.1f}ms.")
+            return self._agents
+
+    @property
+    def snapshots(self):
+        from tools.template_snapshots import get_snapshot_store
+        return get_snapshot_store()
+
+    @property
+    def dev_servers(self):
+        from services.dev_servers import get_dev_server_manager
+        return get_dev_server_manager()
+
+    @property
+    def rate_limiter(self):
+        from services.rate_limiter import get_rate_limiter
+        return get_rate_limiter()
+
+    @property
+    def build_service(self):
+        """The job queue; its worker threads start on first use."""
+        with self._lock:
+            if self._build_service is None:
+                from services.build_jobs import BuildService
+                self._build_service = BuildService().start()
+            return self._build_service
+
+    def shutdown(self):
+        """Stops the build workers and every dev server and closes the HTTP pool. Runs once at exit."""
+        # Modules that were never imported have nothing to clean up.
+        if self._build_service is not None:
+            self._build_service.shutdown(wait=False)
+        if "services.dev_servers" in sys.modules:
+            from services.dev_servers import stop_dev_servers
+            stop_dev_servers()
+        if "services.http_transport" in sys.modules:
+            from services.http_transport import close_transport
+            close_transport()
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime():
+    """Returns the process-wide AgentRuntime, registering its single exit handler on first use."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AgentRuntime()
+            atexit.register(_runtime.shutdown)
+        return _runtime
@@ -0,0 +1,157 @@
+# agents/scheduler.py
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class ScheduledTask:
+    """A unit of work in the build graph together with its ordering constraints."""
+
+    def __init__(self, task_id, fn, depends_on=None, task_type="", payload=None, background=False):
+        self.id = task_id
+        self.fn = fn
+        self.depends_on = set(depends_on or [])
+        self.type = task_type
+        self.payload = payload
+        self.background = background
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def duration(self):
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class TaskScheduler:
+    """
+    Runs a DAG of tasks on a bounded thread pool.
+    A task is submitted as soon as every task it depends on has finished,
+    so wall-clock time follows the critical path instead of the sum of all tasks.
+    Background tasks (e.g. package installs) run on their own small pool so they
+    never take a slot away from the LLM-bound foreground tasks.
+    Completion callbacks run on the calling thread, which keeps UI updates
+    (e.g. Streamlit) off the worker threads. They may add tasks and dependencies,
+    e.g. to retry part of a finished task; these join the running graph.
+    """
+
+    def __init__(self, max_workers=4, background_workers=1):
+        self.max_workers = max(1, int(max_workers))
+        self.background_workers = max(1, int(background_workers))
+        self.tasks = {}
+
+    def add_task(self, task_id, fn, depends_on=None, task_type="", payload=None, background=False):
+        if task_id in self.tasks:
+            raise ValueError(f"Duplicate task id: {task_id}")
+        task = ScheduledTask(task_id, fn, depends_on, task_type, payload, background)
+        self.tasks[task_id] = task
+        return task
+
+    def add_dependency(self, task_id, depends_on):
+        """Makes the not yet started task `task_id` also wait for `depends_on`."""
+        task = self.tasks[task_id]
+        if task.started_at is not None:
+            raise ValueError(f"Task '{task_id}' has already started.")
+        task.depends_on.add(depends_on)
+
+    def _validate(self):
+        for task in self.tasks.values():
+            unknown = task.depends_on - self.tasks.keys()
+            if unknown:
+                raise ValueError(
+                    f"Task '{task.id}' depends on unknown tasks: {sorted(unknown)}")
+        # Kahn's algorithm: anything left over is part of a cycle.
+        remaining = {tid: set(t.depends_on) for tid, t in self.tasks.items()}
+        ready = [tid for tid, deps in remaining.items() if not deps]
+        while ready:
+            done = ready.pop()
+            del remaining[done]
+            for tid, deps in remaining.items():
+                if done in deps:
+                    deps.discard(done)
+                    if not deps:
+                        ready.append(tid)
+        if remaining:
+            raise ValueError(
+                f"Dependency cycle between tasks: {sorted(remaining)}")
+
+    def critical_path(self):
+        """
+        Returns `(seconds, [task ids])` for the longest chain of dependent tasks, using the
+        measured durations of a finished run. This is the lower bound on the DAG's wall time.
+        """
+        finish, via = {}, {}
+
+        def longest(task_id):
+            if task_id not in finish:
+                task = self.tasks[task_id]
+                best = max(task.depends_on, key=longest, default=None)
+                via[task_id] = best
+                finish[task_id] = (finish[best] if best else 0.0) + task.duration
+            return finish[task_id]
+
+        end = max(self.tasks, key=longest, default=None)
+        path = []
+        while end is not None:
+            path.append(end)
+            end = via[end]
+        return (finish[path[0]] if path else 0.0), list(reversed(path))
+
+    @staticmethod
+    def _run_task(task):
+        task.started_at = time.perf_counter()
+        try:
+            task.result = task.fn()
+        except Exception as e:
+            task.error = e
+        finally:
+            task.finished_at = time.perf_counter()
+        return task
+
+    def run(self, on_complete=None, on_tick=None, tick_interval=0.25):
+        """
+        Executes all tasks and returns them in completion order.
+        `on_complete(task)` is called for each finished task and `on_tick()`
+        periodically while tasks are in flight; both run on the caller's thread.
+        A failed task does not block its dependents; check `task.error`.
+        """
+        self._validate()
+        pending = dict(self.tasks)
+        known = set(self.tasks)
+        finished = set()
+        completed = []
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="build-task") as pool, \
+                ThreadPoolExecutor(max_workers=self.background_workers, thread_name_prefix="build-bg") as bg_pool:
+            while pending or in_flight:
+                for tid in [tid for tid, t in pending.items() if t.depends_on <= finished]:
+                    task = pending.pop(tid)
+                    executor = bg_pool if task.background else pool
+                    # Run in a copy of the caller's context so context variables (e.g. the active tracer) carry over.
+                    context = contextvars.copy_context()
+                    in_flight[executor.submit(context.run, self._run_task, task)] = task
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, timeout=tick_interval,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = in_flight.pop(future)
+                    finished.add(task.id)
+                    completed.append(task)
+                    if on_complete:
+                        on_complete(task)
+                added = self.tasks.keys() - known
+                if added:
+                    self._validate()
+                    pending.update((tid, self.tasks[tid]) for tid in added)
+                    known |= added
+                if on_tick and in_flight:
+                    on_tick()
+
+        return completed
@@ -1,6 +1,9 @@
 # app.py
+import json
+import time
 import streamlit as st
-from agents.coordinator import Coordinator
+from agents.runtime import get_runtime
+from services.build_jobs import ACTIVE_STATUSES
 import config
 
 st.set_page_config(layout="wide")
@@ -8,7 +11,13 @@ st.set_page_config(layout="wide")
 st.title("🤖 Auto-Running Frontend Agent")
 st.write("This agent builds a new React application and automatically runs the dev server for you to preview.")
 
-coordinator = Coordinator(st)
+# Builds run on the process-wide worker pool; this page only submits jobs and polls their progress.
+# Agents and HTTP clients are created by the first build, so a rerun costs a few database reads.
+service = get_runtime().build_service
+job_ids = st.session_state.setdefault("job_ids", [])
+
+STATUS_ICONS = {"queued": "🕒", "running": "⏳", "succeeded": "✅", "failed": "❌", "cancelled": "🚫"}
+LOG_PREFIXES = {"info": "ℹ️", "success": "✅", "error": "❌", "warning": "⚠️", "section": "▸"}
 
 with st.form("request_form"):
     user_request = st.text_area(
@@ -22,6 +31,12 @@ with st.form("request_form"):
         "https://github.com/dan5py/react-vite-shadcn-ui"
     )
 
+    codename = st.text_input(
+        "Existing project codename (optional)",
+        "",
+        help="Codename of a previously built project. Only the components affected by the description above are regenerated."
+    )
+
     submitted = st.form_submit_button("🚀 Build & Run Frontend")
 
 if submitted:
@@ -30,5 +45,67 @@ if submitted:
     elif not base_repo_url or "github.com" not in base_repo_url:
         st.error("Please provide a valid GitHub URL for the base repository.")
     else:
-        st.info("Agents are starting the build process...")
-        coordinator.run_frontend_build(user_request, base_repo_url)
+        job_ids.append(service.submit(user_request, base_repo_url, codename.strip() or None))
+        st.info("Build queued. Progress is shown below.")
+
+
+def render_logs(job_id):
+    lines = []
+    entries = service.store.logs(job_id)
+    if entries and entries[0]["seq"] > 1:
+        st.caption(f"{entries[0]['seq'] - 1} earlier log lines not shown.")
+    for entry in entries:
+        level, text = entry["level"], entry["text"]
+        if level == "code":
+            if lines:
+                st.markdown("\n\n".join(lines))
+                lines = []
+            st.code(text, language="bash")
+        elif level in ("json", "table"):
+            st.json(json.loads(text), expanded=False)
+        else:
+            lines.append(f"{LOG_PREFIXES.get(level, '')} {text}".strip())
+    if lines:
+        st.markdown("\n\n".join(lines))
+
+
+if job_ids:
+    st.subheader("Your builds")
+for job_id in reversed(job_ids):
+    job = service.store.get(job_id)
+    if job is None:
+        continue
+    name = job["project"] or job["codename"] or f"job {job_id}"
+    active = job["status"] in ACTIVE_STATUSES
+    with st.expander(f"{STATUS_ICONS.get(job['status'], '')} {name} — {job['status']}", expanded=active):
+        st.caption(job["user_request"])
+        if job["status"] == "running":
+            waiting = get_runtime().rate_limiter.queue_depth()
+            if waiting:
+                st.caption(f"{waiting} LLM call(s) waiting for the model's rate limit.")
+        if job["status"] == "running" and job["progress"]:
+            if job["progress_level"] == "code":
+                st.code(job["progress"], language="bash")
+            else:
+                st.markdown(job["progress"])
+        if job["status"] == "queued":
+            st.write(f"Position in queue: {service.store.queue_position(job_id)}")
+            if st.button("Cancel", key=f"cancel-{job_id}"):
+                service.store.cancel(job_id)
+                st.rerun()
+        preview = service.preview(job) if job["status"] == "succeeded" else None
+        if preview and preview.ready:
+            st.markdown(f"🎉 [**Open preview**]({preview.url})")
+            st.caption(f"Dev server on port {preview.port}, ready in {preview.time_to_ready:.1f}s.")
+            if st.button("Stop preview", key=f"stop-{job_id}"):
+                service.stop_preview(job_id)
+                st.rerun()
+        elif job["status"] == "succeeded":
+            st.caption("Preview stopped. Submit an update with this codename to start it again.")
+        if job["error"] and job["status"] == "failed":
+            st.error(job["error"])
+        render_logs(job_id)
+
+if any((service.store.get(job_id) or {}).get("status") in ACTIVE_STATUSES for job_id in job_ids):
+    time.sleep(config.BUILD_POLL_INTERVAL)
+    st.rerun()
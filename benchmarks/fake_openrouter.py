@@ -0,0 +1,275 @@
+# benchmarks/fake_openrouter.py
+import argparse
+import collections
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def make_plan(size, base_plan):
+    """
+    Returns the recorded plan resized to `size` components, App.tsx always last.
+    Extra components come in section/item pairs where each section uses its item,
+    so larger plans keep a realistic share of dependent components.
+    """
+    leaves = [c for c in base_plan["components"] if c["file_path"] != "App.tsx"]
+    components = leaves[:max(0, size - 1)]
+    index = 1
+    while len(components) < size - 1:
+        item = {"file_path": f"components/common/FeatureItem{index}.tsx",
+                "description": f"Compact card describing retro feature number {index}."}
+        components.append(item)
+        if len(components) < size - 1:
+            components.append({"file_path": f"components/sections/FeatureSection{index}.tsx",
+                               "description": f"Section with a heading and three FeatureItem{index} cards in a row."})
+        index += 1
+    names = ", ".join(os.path.splitext(os.path.basename(c["file_path"]))[0] for c in components)
+    app = {"file_path": "App.tsx", "description": f"Root component composing {names}."}
+    return dict(base_plan, components=components + [app])
+
+
+class FakeOpenRouterServer(ThreadingHTTPServer):
+    """
+    A local stand-in for the OpenRouter chat completions endpoint.
+    Answers planner calls with a recorded plan resized to `plan_size`, component calls with
+    a recorded `write_react_component` tool call per requested file (leaving out `drop_rate`
+    of the files of a batched request), and dependency calls with an `execute_shell_command`
+    tool call. Latency is `ttfb` plus generation at
+    `tokens_per_second`; `error_rate` of requests fail with a 503, and `tail_rate` of them
+    wait `tail_latency` extra seconds before answering. With `rate_limit`, requests beyond that
+    many per `rate_window` seconds are rejected with a 429 and `Retry-After`. Supports SSE streaming.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), plan_size=12, ttfb=0.8, tokens_per_second=120.0,
+                 error_rate=0.0, seed=0, tail_rate=0.0, tail_latency=0.0, drop_rate=0.0, rate_limit=0,
+                 rate_window=60.0):
+        super().__init__(address, FakeOpenRouterHandler)
+        self.plan_size = plan_size
+        self.ttfb = ttfb
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.drop_rate = drop_rate
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.accepted = collections.deque()
+        self.random = random.Random(seed)
+        self.base_plan = json.loads(_load_fixture("plan.json"))
+        self.component_code = _load_fixture("component.tsx")
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "slow": 0, "dropped": 0, "rate_limited": 0,
+                      "planner": 0, "component": 0, "dependency": 0}
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/api/v1/chat/completions"
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def should_fail(self):
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def should_drop(self):
+        with self.lock:
+            drop = self.random.random() < self.drop_rate
+        if drop:
+            self.count("dropped")
+        return drop
+
+    def retry_after(self):
+        """Seconds until the sliding window has room when it is full (the request is rejected), else None."""
+        if not self.rate_limit:
+            return None
+        now = time.monotonic()
+        with self.lock:
+            while self.accepted and self.accepted[0] <= now - self.rate_window:
+                self.accepted.popleft()
+            if len(self.accepted) < self.rate_limit:
+                self.accepted.append(now)
+                return None
+            self.stats["rate_limited"] += 1
+            return self.accepted[0] + self.rate_window - now
+
+    def extra_latency(self):
+        with self.lock:
+            slow = self.random.random() < self.tail_rate
+        if slow:
+            self.count("slow")
+        return self.tail_latency if slow else 0.0
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = dict.fromkeys(self.stats, 0)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True, name="fake-openrouter").start()
+        return self
+
+
+class FakeOpenRouterHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionResetError:
+            pass  # the client dropped a kept-alive connection, e.g. after an error response
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _message_for(self, request):
+        system = request["messages"][0]["content"]
+        user = request["messages"][-1]["content"]
+        if "project planner" in system:
+            self.server.count("planner")
+            plan = make_plan(self.server.plan_size, self.server.base_plan)
+            return {"role": "assistant", "content": json.dumps(plan)}, []
+
+        if "write_react_component" in system:
+            self.server.count("component")
+            file_paths = [path.strip() for path in re.findall(r"File Path: (.+)", user)]
+            if len(file_paths) > 1:
+                # Always keep the first file so a batch never comes back empty.
+                file_paths = file_paths[:1] + [path for path in file_paths[1:] if not self.server.should_drop()]
+            calls = []
+            for file_path in file_paths:
+                name = os.path.splitext(os.path.basename(file_path))[0]
+                calls.append(("write_react_component", {"file_path": file_path,
+                                                        "code": self.server.component_code.replace("__NAME__", name)}))
+            return {"role": "assistant", "content": None}, calls
+
+        self.server.count("dependency")
+        project_path = re.search(r"located at '([^']*)'", user).group(1)
+        packages = re.search(r"dependencies to install are: (.*)", user).group(1).replace(",", " ")
+        command = f"pnpm add {packages}" if "pnpm add" in user else f"pnpm dlx shadcn-ui@latest add {packages} --yes"
+        return {"role": "assistant", "content": None}, [
+            ("execute_shell_command", {"command": command, "cwd_override": project_path})]
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self.server.count("requests")
+        retry_after = self.server.retry_after()
+        if retry_after is not None:
+            self._send_json(429, {"error": {"code": 429, "message": "Rate limit exceeded"}},
+                            {"Retry-After": str(math.ceil(retry_after))})
+            return
+        time.sleep(self.server.ttfb + self.server.extra_latency())
+        if self.server.should_fail():
+            self.server.count("errors")
+            self._send_json(503, {"error": {"code": 503, "message": "Fake upstream overloaded"}})
+            return
+
+        message, tool_calls = self._message_for(request)
+        arguments = [json.dumps(args) for _, args in tool_calls]
+        generated = "".join(arguments) if tool_calls else message["content"]
+        completion_tokens = max(1, len(generated) // 4)
+        prompt_tokens = sum(len(m.get("content") or "") for m in request["messages"]) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        generation_time = completion_tokens / self.server.tokens_per_second
+
+        if request.get("stream"):
+            try:
+                self._stream(message, tool_calls, arguments, generated, usage, generation_time)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client cancelled the stream, e.g. a hedged request that lost
+            return
+
+        time.sleep(generation_time)
+        if tool_calls:
+            message["tool_calls"] = [{"id": f"call_{i}", "type": "function",
+                                      "function": {"name": name, "arguments": arguments[i]}}
+                                     for i, (name, _) in enumerate(tool_calls)]
+        self._send_json(200, {"id": "fake-completion", "model": request.get("model"), "usage": usage,
+                              "choices": [{"index": 0, "message": message,
+                                           "finish_reason": "tool_calls" if tool_calls else "stop"}]})
+
+    def _stream(self, message, tool_calls, arguments, generated, usage, generation_time):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(text):
+            data = text.encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def event(delta, finish_reason=None, **extra):
+            chunk = dict({"id": "fake-completion", "choices": [
+                {"index": 0, "delta": delta, "finish_reason": finish_reason}]}, **extra)
+            send(f"data: {json.dumps(chunk)}\n\n")
+
+        send(": OPENROUTER PROCESSING\n\n")
+        if not tool_calls:
+            pieces = [generated[i:i + 200] for i in range(0, len(generated), 200)] or [""]
+            for piece in pieces:
+                time.sleep(generation_time / len(pieces))
+                event({"content": piece})
+        for index, (name, _) in enumerate(tool_calls):
+            event({"role": "assistant", "tool_calls": [{"index": index, "id": f"call_{index}", "type": "function",
+                                                        "function": {"name": name, "arguments": ""}}]})
+            pieces = [arguments[index][i:i + 200] for i in range(0, len(arguments[index]), 200)]
+            for piece in pieces:
+                time.sleep(generation_time * len(piece) / max(1, len(generated)))
+                event({"tool_calls": [{"index": index, "function": {"arguments": piece}}]})
+        event({}, finish_reason="tool_calls" if tool_calls else "stop", usage=usage)
+        send("data: [DONE]\n\n")
+        send("")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local fake OpenRouter endpoint.")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--plan-size", type=int, default=12)
+    parser.add_argument("--ttfb", type=float, default=0.8)
+    parser.add_argument("--tokens-per-second", type=float, default=120.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=0)
+    parser.add_argument("--rate-window", type=float, default=60.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="Fraction of files left out of batched component responses.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    server = FakeOpenRouterServer(("127.0.0.1", args.port), args.plan_size, args.ttfb,
+                                  args.tokens_per_second, args.error_rate, seed=args.seed,
+                                  tail_rate=args.tail_rate, tail_latency=args.tail_latency,
+                                  drop_rate=args.drop_rate, rate_limit=args.rate_limit,
+                                  rate_window=args.rate_window)
+    print(f"Fake OpenRouter listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
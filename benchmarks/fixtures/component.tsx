@@ -0,0 +1,49 @@
+import React from "react";
+import { motion } from "framer-motion";
+import { Button } from "@/components/ui/button";
+import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
+import { cn } from "@/lib/utils";
+
+interface __NAME__Props {
+  className?: string;
+  title?: string;
+}
+
+/**
+ * __NAME__ renders a retro, 8-bit styled block for the portfolio.
+ */
+export const __NAME__: React.FC<__NAME__Props> = ({ className, title = "__NAME__" }) => {
+  const [active, setActive] = React.useState(false);
+
+  return (
+    <motion.section
+      initial={{ opacity: 0, y: 20 }}
+      animate={{ opacity: 1, y: 0 }}
+      transition={{ duration: 0.3 }}
+      className={cn("mx-auto flex max-w-5xl flex-col gap-4 p-6 md:p-8", className)}
+      aria-labelledby="__NAME__-title"
+    >
+      <Card className="border-4 border-foreground bg-card shadow-[4px_4px_0_0] shadow-foreground">
+        <CardHeader>
+          <CardTitle id="__NAME__-title" className="font-mono text-2xl uppercase tracking-widest">
+            {title}
+          </CardTitle>
+        </CardHeader>
+        <CardContent className="flex flex-col gap-4">
+          <p className="font-mono text-sm text-muted-foreground">
+            Press start to continue. This block was generated for the benchmark fixture.
+          </p>
+          <Button
+            className={cn("w-fit font-mono uppercase", active && "bg-primary/80")}
+            onClick={() => setActive((prev) => !prev)}
+            aria-pressed={active}
+          >
+            {active ? "Player 1 ready" : "Insert coin"}
+          </Button>
+        </CardContent>
+      </Card>
+    </motion.section>
+  );
+};
+
+export default __NAME__;
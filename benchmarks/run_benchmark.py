@@ -0,0 +1,210 @@
+# benchmarks/run_benchmark.py
+"""
+End-to-end build benchmark. Runs Coordinator.run_frontend_build headless against a
+local fake OpenRouter endpoint and `git`/`pnpm` shims, so it works offline.
+
+    python -m benchmarks.run_benchmark --sizes 3,6,12,25,50 --output results.jsonl
+
+Each run appends one JSON object per line to the output file.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHIMS_DIR = os.path.join(REPO_ROOT, "benchmarks", "shims")
+# Stages that run strictly one after another around the task DAG. The workspace
+# bootstrap overlaps planning, so only the longer of the two is on the critical path.
+SEQUENTIAL_STAGES = ("tsconfig", "typecheck", "dev_server")
+BOOTSTRAP_STAGES = ("workspace", "clone")
+BENCH_REQUEST = ("Create a simple portfolio landing page for a developer named 'Alex Doe'. It should have a "
+                 "retro, 8-bit theme with a header, a hero with a typing animation, a project gallery and a footer.")
+BENCH_REPO_URL = "https://github.com/dan5py/react-vite-shadcn-ui"
+
+
+def _configure_environment(args, workdir):
+    """
+    Must run before `config` is imported: config reads the environment once. Also used by
+    run_job_queue, whose arguments lack the hedging, batching and rate limit options.
+    """
+    scale = args.time_scale
+    os.environ.update({
+        "PATH": SHIMS_DIR + os.pathsep + os.environ.get("PATH", ""),
+        "OPENROUTER_API_KEY": "benchmark",
+        "LLM_CACHE_MODE": "off",
+        "LLM_STREAMING": "true" if args.stream else "false",
+        "MAX_CONCURRENT_TASKS": str(args.concurrency),
+        "COMPONENT_BATCHING": "true" if getattr(args, "batching", True) else "false",
+        # The client limiter mirrors the fake server's limit; 0 leaves calls unthrottled.
+        "RATE_LIMIT_ENABLED": "true" if getattr(args, "rate_limiter", True) else "false",
+        "RATE_LIMIT_RPM": str(getattr(args, "rate_limit", 0)),
+        "RATE_LIMIT_WINDOW": str(getattr(args, "rate_window", 60.0)),
+        "TEMPLATE_SNAPSHOT_DIR": os.path.join(workdir, "snapshots"),
+        "TRACE_DIR": os.path.join(workdir, "traces"),
+        "HTTP_BACKOFF_BASE": str(0.2 * scale),
+        "BENCH_GIT_CLONE_SECONDS": str(0.5 * scale),
+        "BENCH_PNPM_INSTALL_SECONDS": str(3.0 * scale),
+        "BENCH_PNPM_ADD_SECONDS": str(1.5 * scale),
+        "BENCH_SHADCN_ADD_SECONDS": str(2.0 * scale),
+        "BENCH_TSC_SECONDS": str(1.0 * scale),
+        "BENCH_DEV_SERVER_SECONDS": str(0.3 * scale),
+    })
+    if getattr(args, "hedge", 0):
+        # The fake server ignores the model, so the alternate only exercises the hedging path.
+        os.environ.update({"LLM_HEDGING": "true", "LLM_HEDGE_INITIAL_DELAY": str(args.hedge),
+                           "COMPONENT_MODELS": "bench/primary,bench/alternate",
+                           "PLANNER_MODELS": "bench/primary,bench/alternate"})
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _critical_path(coordinator):
+    """Sequential stages plus the longest dependency chain through the task DAG."""
+    spans = coordinator.tracer.spans
+    planning = sum(s.duration for s in spans if s.name == "planning")
+    bootstrap = sum(s.duration for s in spans if s.name in BOOTSTRAP_STAGES
+                    or (s.name == "install" and s.attrs.get("kind") == "base"))
+    sequential = max(planning, bootstrap) + sum(s.duration for s in spans if s.name in SEQUENTIAL_STAGES)
+    dag_seconds, dag_path = coordinator.scheduler.critical_path() if coordinator.scheduler else (0.0, [])
+    return sequential + dag_seconds, dag_path
+
+
+def run_once(coordinator_cls, ui_cls, server, size, run_dir, latency_stats=None, rate_limiter=None):
+    os.chdir(REPO_ROOT)  # the coordinator loads template_context.md relative to the repo
+    ui = ui_cls()
+    coordinator = coordinator_cls(ui)
+    os.makedirs(run_dir, exist_ok=True)
+    os.chdir(run_dir)
+
+    server.plan_size = size
+    server.reset_stats()
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        coordinator.run_frontend_build(BENCH_REQUEST, BENCH_REPO_URL)
+    finally:
+        wall = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        coordinator._cleanup_dev_server()
+        os.chdir(REPO_ROOT)
+
+    critical, path = _critical_path(coordinator)
+    llm_spans = [row for row in coordinator.tracer.summary() if row["span"] == "llm"]
+    errors = [text for level, text in ui.messages if level == "error"]
+    return {
+        "components": size,
+        "wall_s": round(wall, 3),
+        "critical_path_s": round(critical, 3),
+        "critical_path": path,
+        "llm_calls": llm_spans[0]["count"] if llm_spans else 0,
+        "llm_requests_served": server.stats["requests"],
+        "llm_errors_injected": server.stats["errors"],
+        "llm_slow_injected": server.stats["slow"],
+        "batch_files_dropped": server.stats["dropped"],
+        "llm_rate_limited": server.stats["rate_limited"],
+        "llm_latency": latency_stats.summary() if latency_stats else [],
+        "rate_limits": rate_limiter.summary() if rate_limiter else [],
+        "peak_python_mb": round(peak / 1e6, 2),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "ui_errors": errors,
+        "stages": coordinator.tracer.summary(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end frontend builds offline.")
+    parser.add_argument("--sizes", default="3,6,12,25,50",
+                        help="Comma-separated plan sizes (component counts).")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=4, help="MAX_CONCURRENT_TASKS for the build.")
+    parser.add_argument("--ttfb", type=float, default=0.8, help="Fake LLM time to first byte (s).")
+    parser.add_argument("--tokens-per-second", type=float, default=120.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of LLM calls answered with 503.")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Fraction of LLM calls delayed by --tail-latency.")
+    parser.add_argument("--tail-latency", type=float, default=10.0, help="Extra delay of slow LLM calls (s).")
+    parser.add_argument("--drop-rate", type=float, default=0.0,
+                        help="Fraction of files left out of batched component responses.")
+    parser.add_argument("--no-batching", dest="batching", action="store_false",
+                        help="Generate every component in its own LLM call.")
+    parser.add_argument("--hedge", type=float, default=0.0, metavar="SECONDS",
+                        help="Enable hedged requests, hedging after SECONDS until latencies are known.")
+    parser.add_argument("--rate-limit", type=int, default=0, metavar="REQUESTS",
+                        help="Fake server and client limit of LLM requests per --rate-window (0 = none).")
+    parser.add_argument("--rate-window", type=float, default=10.0, help="Rate limit window (s).")
+    parser.add_argument("--no-rate-limiter", dest="rate_limiter", action="store_false",
+                        help="Send LLM calls without client-side rate limiting.")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="Multiplier for all simulated git/pnpm durations.")
+    parser.add_argument("--no-stream", dest="stream", action="store_false", help="Use non-streaming completions.")
+    parser.add_argument("--cold", action="store_true", help="Discard template snapshots before every run.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.jsonl")
+    parser.add_argument("--keep-workdir", action="store_true")
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    output = os.path.abspath(args.output)
+    revision = _git_revision()
+
+    workdir = tempfile.mkdtemp(prefix="frontend-bench-")
+    _configure_environment(args, workdir)
+    sys.path.insert(0, REPO_ROOT)
+    from benchmarks.fake_openrouter import FakeOpenRouterServer
+    server = FakeOpenRouterServer(ttfb=args.ttfb, tokens_per_second=args.tokens_per_second,
+                                  error_rate=args.error_rate, seed=args.seed, tail_rate=args.tail_rate,
+                                  tail_latency=args.tail_latency, drop_rate=args.drop_rate,
+                                  rate_limit=args.rate_limit, rate_window=args.rate_window).start()
+    os.environ["OPENROUTER_API_URL"] = server.url
+    from agents.coordinator import Coordinator
+    from services.headless_ui import HeadlessUI
+    from services.model_routing import get_latency_stats
+    from services.rate_limiter import get_rate_limiter
+
+    results = []
+    try:
+        for size in sizes:
+            for repeat in range(args.repeat):
+                if args.cold:
+                    shutil.rmtree(os.environ["TEMPLATE_SNAPSHOT_DIR"], ignore_errors=True)
+                run_dir = os.path.join(workdir, f"run-{size}-{repeat}")
+                result = run_once(Coordinator, HeadlessUI, server, size, run_dir, get_latency_stats(),
+                                  get_rate_limiter())
+                result.update({
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": revision, "repeat": repeat,
+                    "concurrency": args.concurrency, "ttfb": args.ttfb,
+                    "tokens_per_second": args.tokens_per_second, "error_rate": args.error_rate,
+                    "tail_rate": args.tail_rate, "tail_latency": args.tail_latency, "hedge": args.hedge,
+                    "drop_rate": args.drop_rate, "batching": args.batching, "rate_limit": args.rate_limit,
+                    "rate_window": args.rate_window, "rate_limiter": args.rate_limiter,
+                    "time_scale": args.time_scale, "stream": args.stream, "cold": args.cold,
+                })
+                results.append(result)
+                with open(output, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(result) + "\n")
+                print(f"components={size:<3} wall={result['wall_s']:>7.2f}s "
+                      f"critical_path={result['critical_path_s']:>7.2f}s llm_calls={result['llm_calls']:<3} "
+                      f"peak_py={result['peak_python_mb']:.1f}MB http_429={result['llm_rate_limited']} "
+                      f"errors={len(result['ui_errors'])}", file=sys.__stdout__)
+    finally:
+        server.shutdown()
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    print(f"Wrote {len(results)} result(s) to {output}", file=sys.__stdout__)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# benchmarks/run_job_queue.py
+"""
+Runs several builds through the BuildService job queue against the fake OpenRouter
+server and `git`/`pnpm` shims, and reports per-job status, port and timing.
+
+    python -m benchmarks.run_job_queue --jobs 4 --workers 2
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.run_benchmark import BENCH_REPO_URL, BENCH_REQUEST, REPO_ROOT, _configure_environment
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exercise the build job queue offline.")
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--plan-size", type=int, default=6)
+    parser.add_argument("--concurrency", type=int, default=4, help="MAX_CONCURRENT_TASKS within each build.")
+    parser.add_argument("--ttfb", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--time-scale", type=float, default=0.2)
+    parser.add_argument("--no-stream", dest="stream", action="store_false")
+    parser.add_argument("--keep-workdir", action="store_true")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="frontend-jobs-")
+    _configure_environment(args, workdir)
+    os.chdir(REPO_ROOT)  # the coordinator loads template_context.md relative to the repo
+    from benchmarks.fake_openrouter import FakeOpenRouterServer
+    server = FakeOpenRouterServer(plan_size=args.plan_size, ttfb=args.ttfb,
+                                  tokens_per_second=args.tokens_per_second).start()
+    os.environ["OPENROUTER_API_URL"] = server.url
+    from services.build_jobs import ACTIVE_STATUSES, BuildService, JobStore
+
+    service = BuildService(store=JobStore(os.path.join(workdir, "jobs.sqlite3")), workers=args.workers,
+                           jobs_dir=os.path.join(workdir, "workspaces"), poll_interval=0.1).start()
+    started = time.perf_counter()
+    try:
+        job_ids = [service.submit(BENCH_REQUEST, BENCH_REPO_URL) for _ in range(args.jobs)]
+        while any(service.store.get(job_id)["status"] in ACTIVE_STATUSES for job_id in job_ids):
+            time.sleep(0.2)
+        wall = time.perf_counter() - started
+        for job_id in job_ids:
+            job = service.store.get(job_id)
+            print(f"{job_id} {job['status']:<10} port={job['port']} "
+                  f"queued={job['started_at'] - job['created_at']:.2f}s "
+                  f"build={job['finished_at'] - job['started_at']:.2f}s "
+                  f"logs={len(service.store.logs(job_id, limit=10000))} {job['error'] or ''}", file=sys.__stdout__)
+        print(f"{args.jobs} jobs on {args.workers} workers finished in {wall:.2f}s", file=sys.__stdout__)
+    finally:
+        service.shutdown()
+        service.store.close()
+        server.shutdown()
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
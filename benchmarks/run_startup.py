@@ -0,0 +1,119 @@
+# benchmarks/run_startup.py
+"""
+Measures what a Streamlit session pays before any build runs: the cold start of a fresh
+process (imports plus the shared runtime), the one-off creation of the agents, and the
+per-rerun cost of everything that is already warm. Also checks that repeated reruns and
+coordinators do not register exit handlers or create HTTP clients.
+
+    python -m benchmarks.run_startup --reruns 50
+"""
+import argparse
+import atexit
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.run_benchmark import REPO_ROOT
+
+COLD_START_SNIPPET = """
+import time
+started = time.perf_counter()
+from agents.runtime import get_runtime
+from services.build_jobs import ACTIVE_STATUSES
+runtime = get_runtime()
+service = runtime.build_service
+imported = time.perf_counter()
+runtime.agents()
+print(f"{imported - started} {time.perf_counter() - imported}")
+"""
+
+
+def _cold_start(env):
+    """Runs the app's startup path in a fresh interpreter; returns (runtime seconds, agents seconds)."""
+    output = subprocess.run([sys.executable, "-c", COLD_START_SNIPPET], cwd=REPO_ROOT, env=env, check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+    runtime_s, agents_s = output.split()[-2:]
+    return float(runtime_s), float(agents_s)
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _app_reruns(reruns):
+    """Times full reruns of app.py with Streamlit's AppTest; None when Streamlit is not installed."""
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return None
+    app = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"))
+    app.run()
+    timings = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold start and per-rerun overhead.")
+    parser.add_argument("--cold-runs", type=int, default=3)
+    parser.add_argument("--reruns", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="frontend-startup-")
+    os.environ.update({"OPENROUTER_API_KEY": "benchmark", "BUILD_JOBS_DIR": os.path.join(workdir, "jobs"),
+                       "LLM_CACHE_DIR": os.path.join(workdir, "llm_cache")})
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+
+    cold = [_cold_start(dict(os.environ)) for _ in range(args.cold_runs)]
+
+    from agents.coordinator import Coordinator
+    from agents.runtime import get_runtime
+    from services.headless_ui import HeadlessUI
+    runtime = get_runtime()
+    service = runtime.build_service
+    handlers = atexit._ncallbacks()
+    agents = runtime.agents()
+
+    # What every rerun of app.py does besides rendering: look up the runtime and read job state.
+    rerun_timings = []
+    for _ in range(args.reruns):
+        started = time.perf_counter()
+        get_runtime().build_service.store.list_jobs(limit=10)
+        rerun_timings.append(time.perf_counter() - started)
+
+    coordinator_timings = []
+    for _ in range(args.reruns):
+        started = time.perf_counter()
+        coordinator = Coordinator(HeadlessUI())
+        coordinator_timings.append(time.perf_counter() - started)
+
+    leaks = {
+        "atexit_handlers_added": atexit._ncallbacks() - handlers,
+        "agents_rebuilt": runtime.agents() is not agents,
+        "clients_not_shared": coordinator.planner.client.transport is not agents[1].client.transport,
+    }
+    app_timings = _app_reruns(args.reruns)
+    result = {
+        "cold_start_runtime_ms": round(1000 * min(r for r, _ in cold), 2),
+        "cold_agents_ms": round(1000 * min(a for _, a in cold), 2),
+        "rerun_p50_ms": round(1000 * _percentile(rerun_timings, 0.5), 3),
+        "rerun_p99_ms": round(1000 * _percentile(rerun_timings, 0.99), 3),
+        "coordinator_p50_ms": round(1000 * _percentile(coordinator_timings, 0.5), 3),
+        "app_rerun_p50_ms": round(1000 * _percentile(app_timings, 0.5), 2) if app_timings else None,
+        "leaks": leaks,
+    }
+    service.shutdown(wait=False)
+    print(json.dumps(result, indent=2), file=sys.__stdout__)
+    return 1 if any(leaks.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
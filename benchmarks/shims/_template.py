@@ -0,0 +1,53 @@
+# benchmarks/shims/_template.py
+import json
+import os
+
+# Roughly the shape of the real template's dependency tree, scaled down.
+FAKE_PACKAGES = 120
+FILES_PER_PACKAGE = 8
+
+TEMPLATE_FILES = {
+    "package.json": json.dumps({
+        "name": "react-vite-shadcn-ui", "private": True, "type": "module",
+        "scripts": {"dev": "vite", "build": "tsc && vite build"},
+        "dependencies": {"react": "^18.2.0", "react-dom": "^18.2.0"},
+    }, indent=2),
+    "pnpm-lock.yaml": "lockfileVersion: '6.0'\n\ndependencies:\n  react:\n    specifier: ^18.2.0\n",
+    "index.html": '<!doctype html>\n<html lang="en"><body><div id="root"></div>'
+                  '<script type="module" src="/src/main.tsx"></script></body></html>\n',
+    "tsconfig.node.json": json.dumps({"compilerOptions": {"composite": True}, "include": ["vite.config.ts"]}),
+    "vite.config.ts": "export default {};\n",
+    "components.json": json.dumps({"style": "default", "tsx": True}),
+    os.path.join("src", "main.tsx"): 'import React from "react";\nimport App from "./App.tsx";\n'
+                                     'import "./styles/globals.css";\n',
+    os.path.join("src", "App.tsx"): "export default function App() { return null; }\n",
+    os.path.join("src", "styles", "globals.css"): "@tailwind base;\n",
+    os.path.join("src", "lib", "utils.ts"): "export function cn(...c: string[]) { return c.join(' '); }\n",
+    os.path.join(".git", "HEAD"): "ref: refs/heads/main\n",
+    os.path.join(".git", "objects", "ab", "cdef0123456789"): "blob\n",
+}
+
+
+def write_template(dest):
+    for rel_path, content in TEMPLATE_FILES.items():
+        path = os.path.join(dest, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+def write_node_modules(dest):
+    root = os.path.join(dest, "node_modules")
+    os.makedirs(os.path.join(root, ".bin"), exist_ok=True)
+    with open(os.path.join(root, ".modules.yaml"), "w", encoding="utf-8") as f:
+        f.write("layoutVersion: 5\nvirtualStoreDir: .pnpm\n")
+    for i in range(FAKE_PACKAGES):
+        name = f"fake-package-{i}"
+        package_dir = os.path.join(root, ".pnpm", f"{name}@1.0.0", "node_modules", name)
+        os.makedirs(package_dir, exist_ok=True)
+        for j in range(FILES_PER_PACKAGE):
+            with open(os.path.join(package_dir, f"file{j}.js"), "w", encoding="utf-8") as f:
+                f.write(f"module.exports = {j};\n" * 64)
+        link = os.path.join(root, name)
+        if not os.path.lexists(link):
+            os.symlink(os.path.join(".pnpm", f"{name}@1.0.0", "node_modules", name), link)
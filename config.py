@@ -8,9 +8,121 @@ load_dotenv()
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 YOUR_SITE_URL = os.getenv("YOUR_SITE_URL", "")
 YOUR_SITE_NAME = os.getenv("YOUR_SITE_NAME", "")
+# Overridable so the client can be pointed at a local stand-in of the API.
+OPENROUTER_API_URL = os.getenv(
+    "OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
+
+# HTTP transport: shared connection pool, per-call deadlines (seconds) and retry backoff.
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "180"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "1.0"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+
+# Stream completions over SSE for live progress; a stream silent for STREAM_STALL_TIMEOUT seconds is aborted.
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() in ("1", "true", "yes")
+STREAM_STALL_TIMEOUT = float(os.getenv("STREAM_STALL_TIMEOUT", "30"))
+
+# LLM response cache: "off", "readwrite" (serve hits, record misses) or "replay" (offline, hits only).
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "readwrite")
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+LLM_CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "200")) * 1024 * 1024)
+LLM_CACHE_MAX_AGE = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600
 
 # Model Selection for OpenRouter
-MODEL_NAME = "deepseek/deepseek-chat-v3.1:free"
+MODEL_NAME = os.getenv("MODEL_NAME", "deepseek/deepseek-chat-v3.1:free")
+
+# Per-agent model routing: comma-separated models (primary first, then alternates for hedging and
+# fallback), sampling temperature and completion token limit. Agents not listed here use MODEL_NAME.
+MODEL_ROUTES = {
+    "PlannerAgent": {
+        "models": os.getenv("PLANNER_MODELS", MODEL_NAME).split(","),
+        "temperature": float(os.getenv("PLANNER_TEMPERATURE", "0.2")),
+        "max_tokens": int(os.getenv("PLANNER_MAX_TOKENS", "8192")),
+    },
+    "ComponentAgent": {
+        "models": os.getenv("COMPONENT_MODELS", MODEL_NAME).split(","),
+        "temperature": float(os.getenv("COMPONENT_TEMPERATURE", "0.2")),
+        "max_tokens": int(os.getenv("COMPONENT_MAX_TOKENS", "8192")),
+    },
+    "DependencyAgent": {
+        "models": os.getenv("DEPENDENCY_MODELS", MODEL_NAME).split(","),
+        "temperature": float(os.getenv("DEPENDENCY_TEMPERATURE", "0.2")),
+        "max_tokens": int(os.getenv("DEPENDENCY_MAX_TOKENS", "1024")),
+    },
+}
+
+# Hedged requests: when a call outlives its model's LLM_HEDGE_PERCENTILE latency, the route's next model
+# is called too and the first valid response wins. Until LLM_HEDGE_MIN_SAMPLES calls have been timed, the
+# hedge fires after LLM_HEDGE_INITIAL_DELAY seconds.
+LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.9"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_INITIAL_DELAY = float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "30"))
+
+# Client-side rate limiting per model: requests and estimated tokens per RATE_LIMIT_WINDOW seconds (0 = no
+# limit). RATE_LIMITS overrides single models as "model=rpm/tpm,..."; the default matches OpenRouter's :free
+# models. Callers queue in arrival order; one that would wait longer than RATE_LIMIT_MAX_WAIT seconds fails.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_RPM = int(os.getenv("RATE_LIMIT_RPM", "20"))
+RATE_LIMIT_TPM = int(os.getenv("RATE_LIMIT_TPM", "0"))
+RATE_LIMITS = {
+    model.strip(): tuple(int(n or 0) for n in (limits.split("/") + ["0"])[:2])
+    for model, _, limits in (item.rpartition("=") for item in os.getenv("RATE_LIMITS", "").split(","))
+    if model.strip()
+}
+RATE_LIMIT_WINDOW = float(os.getenv("RATE_LIMIT_WINDOW", "60"))
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "300"))
 
 # This is the path where the agent will create and manage the React project.
 WORKSPACE_DIR = "generated_frontend_project"
+
+# Warm template snapshots: clone + install each base repo once and create workspaces from it.
+USE_TEMPLATE_SNAPSHOTS = os.getenv("USE_TEMPLATE_SNAPSHOTS", "true").lower() in ("1", "true", "yes")
+TEMPLATE_SNAPSHOT_DIR = os.getenv("TEMPLATE_SNAPSHOT_DIR", ".template_snapshots")
+
+# Approximate token budget for the template_context.md sections sent with each LLM call.
+TEMPLATE_CONTEXT_TOKEN_BUDGET = int(os.getenv("TEMPLATE_CONTEXT_TOKEN_BUDGET", "1200"))
+
+# Approximate token budget of the project file tree (with component exports) sent to the planner.
+PROJECT_TREE_TOKEN_BUDGET = int(os.getenv("PROJECT_TREE_TOKEN_BUDGET", "800"))
+
+# Build tracing: per-stage spans shown in the UI and exported as Chrome trace JSON to TRACE_DIR.
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() in ("1", "true", "yes")
+TRACE_DIR = os.getenv("TRACE_DIR", ".traces")
+# Only the TRACE_KEEP most recent trace files are kept in TRACE_DIR.
+TRACE_KEEP = int(os.getenv("TRACE_KEEP", "20"))
+
+# Shell commands: wall-clock and no-output limits (seconds, 0 disables) and kept output tail per stream.
+SHELL_TIMEOUT = float(os.getenv("SHELL_TIMEOUT", "900"))
+SHELL_IDLE_TIMEOUT = float(os.getenv("SHELL_IDLE_TIMEOUT", "300"))
+SHELL_OUTPUT_TAIL_BYTES = int(float(os.getenv("SHELL_OUTPUT_TAIL_KB", "64")) * 1024)
+
+# Type-check generated components with one incremental `tsc` pass and send failing files back for repair.
+TYPECHECK_ENABLED = os.getenv("TYPECHECK_ENABLED", "true").lower() in ("1", "true", "yes")
+TYPECHECK_MAX_REPAIR_ROUNDS = int(os.getenv("TYPECHECK_MAX_REPAIR_ROUNDS", "2"))
+
+# Vite dev server port for builds run from the command line or a single session.
+DEV_SERVER_PORT = int(os.getenv("DEV_SERVER_PORT", "5173"))
+PREVIEW_HOST = os.getenv("PREVIEW_HOST", "localhost")
+
+# Dev servers: port range, readiness timeout (seconds), and how many stay running / for how long when idle.
+DEV_SERVER_PORT_MAX = int(os.getenv("DEV_SERVER_PORT_MAX", "5199"))
+DEV_SERVER_READY_TIMEOUT = float(os.getenv("DEV_SERVER_READY_TIMEOUT", "60"))
+DEV_SERVER_MAX_RUNNING = int(os.getenv("DEV_SERVER_MAX_RUNNING", "5"))
+DEV_SERVER_IDLE_TTL = float(os.getenv("DEV_SERVER_IDLE_TTL_MINUTES", "30")) * 60
+
+# Build job queue: concurrent builds, job database/workspaces, and UI refresh interval (seconds).
+BUILD_WORKERS = int(os.getenv("BUILD_WORKERS", "2"))
+BUILD_JOBS_DIR = os.getenv("BUILD_JOBS_DIR", ".build_jobs")
+BUILD_POLL_INTERVAL = float(os.getenv("BUILD_POLL_INTERVAL", "2"))
+
+# Generate small independent components of one directory together: one LLM call writes up to
+# COMPONENT_BATCH_MAX_FILES files totalling about COMPONENT_BATCH_MAX_TOKENS estimated output tokens.
+COMPONENT_BATCHING = os.getenv("COMPONENT_BATCHING", "true").lower() in ("1", "true", "yes")
+COMPONENT_BATCH_MAX_FILES = int(os.getenv("COMPONENT_BATCH_MAX_FILES", "4"))
+COMPONENT_BATCH_MAX_TOKENS = int(os.getenv("COMPONENT_BATCH_MAX_TOKENS", "2400"))
+
+# Maximum number of build tasks (component generation, installs) running at once.
+MAX_CONCURRENT_TASKS = int(os.getenv("MAX_CONCURRENT_TASKS", "4"))
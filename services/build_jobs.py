@@ -0,0 +1,269 @@
+# services/build_jobs.py
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import config
+
+# Only the standard library and config are imported at module level: app.py loads this module on
+# every Streamlit rerun, and the dev server manager (and shell tools) are needed only for previews.
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+ACTIVE_STATUSES = ("queued", "running")
+JOB_COLUMNS = ("id", "status", "user_request", "base_repo_url", "codename", "workspace", "project",
+               "port", "preview_url", "error", "created_at", "started_at", "finished_at",
+               "progress_level", "progress")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    user_request TEXT NOT NULL,
+    base_repo_url TEXT NOT NULL,
+    codename TEXT,
+    workspace TEXT,
+    project TEXT,
+    port INTEGER,
+    preview_url TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    progress_level TEXT,
+    progress TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_logs (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    level TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+
+class JobStore:
+    """
+    Build jobs and their log lines in SQLite, so queued work and history survive a
+    restart. One connection is shared by all threads and serialized with a lock.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(config.BUILD_JOBS_DIR, "jobs.sqlite3")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        # Databases created before live progress was stored lack its columns.
+        columns = {row["name"] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column in ("progress_level", "progress"):
+            if column not in columns:
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+        self._log_seq = {}
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def submit(self, user_request, base_repo_url, codename=None):
+        job_id = uuid.uuid4().hex[:12]
+        self._execute("INSERT INTO jobs (id, status, user_request, base_repo_url, codename, created_at) "
+                      "VALUES (?, 'queued', ?, ?, ?, ?)", (job_id, user_request, base_repo_url, codename, time.time()))
+        return job_id
+
+    def get(self, job_id):
+        rows = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return dict(rows[0]) if rows else None
+
+    def list_jobs(self, limit=50):
+        return [dict(row) for row in self._execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))]
+
+    def queue_position(self, job_id):
+        """1-based position of a queued job, or None when it is not queued."""
+        rows = self._execute(
+            "SELECT COUNT(*) AS ahead FROM jobs WHERE status = 'queued' AND created_at <= "
+            "(SELECT created_at FROM jobs WHERE id = ? AND status = 'queued')", (job_id,))
+        return rows[0]["ahead"] or None
+
+    def claim_next(self):
+        """
+        Atomically marks the oldest runnable queued job as running and returns it. Jobs
+        updating a project that another job is currently updating wait their turn.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' AND (codename IS NULL OR codename NOT IN "
+                    "(SELECT codename FROM jobs WHERE status = 'running' AND codename IS NOT NULL)) "
+                    "ORDER BY created_at LIMIT 1").fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?",
+                                     (time.time(), row["id"]))
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+        return dict(row, status="running") if row is not None else None
+
+    def update(self, job_id, **fields):
+        unknown = set(fields) - set(JOB_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def cancel(self, job_id):
+        """Cancels a job that has not started yet. Returns True if it was cancelled."""
+        with self._lock:
+            cursor = self._db.execute("UPDATE jobs SET status = 'cancelled', finished_at = ? "
+                                      "WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+            return cursor.rowcount > 0
+
+    def requeue_interrupted(self):
+        """Puts jobs left 'running' by a previous process back in the queue."""
+        with self._lock:
+            return self._db.execute("UPDATE jobs SET status = 'queued', started_at = NULL, port = NULL, "
+                                    "progress_level = NULL, progress = NULL WHERE status = 'running'").rowcount
+
+    def latest_workspace(self, project):
+        """Workspace of the most recent successful build of `project`, or None."""
+        rows = self._execute("SELECT workspace FROM jobs WHERE project = ? AND status = 'succeeded' "
+                             "ORDER BY finished_at DESC LIMIT 1", (project,))
+        return rows[0]["workspace"] if rows else None
+
+    def append_log(self, job_id, level, text):
+        with self._lock:
+            if job_id not in self._log_seq:
+                row = self._db.execute("SELECT MAX(seq) FROM job_logs WHERE job_id = ?", (job_id,)).fetchone()
+                self._log_seq[job_id] = row[0] or 0
+            self._log_seq[job_id] += 1
+            self._db.execute("INSERT INTO job_logs (job_id, seq, ts, level, text) VALUES (?, ?, ?, ?, ?)",
+                             (job_id, self._log_seq[job_id], time.time(), level, text))
+
+    def logs(self, job_id, after_seq=0, limit=500):
+        """
+        The newest `limit` log entries of a job with `seq` greater than `after_seq`, oldest
+        first, so a long build still shows its last lines (final errors, preview URL).
+        """
+        rows = self._execute(
+            "SELECT seq, ts, level, text FROM job_logs WHERE job_id = ? AND seq > ? ORDER BY seq DESC LIMIT ?",
+            (job_id, after_seq, limit))
+        return [dict(row) for row in reversed(rows)]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class BuildService:
+    """
+    Runs queued build jobs on a pool of `workers` threads. Every job builds in its own
+    workspace directory; updates reuse the workspace of the project's last successful
+    build. Previews are served by the process-wide DevServerManager, which gives each
+    project its own port and keeps its server running across updates.
+    """
+
+    def __init__(self, store=None, workers=None, jobs_dir=None, poll_interval=1.0):
+        self.store = store or JobStore()
+        self.workers = workers or config.BUILD_WORKERS
+        self.jobs_dir = jobs_dir or os.path.join(config.BUILD_JOBS_DIR, "workspaces")
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        requeued = self.store.requeue_interrupted()
+        if requeued:
+            print(f"BuildService: re-queued {requeued} job(s) interrupted by a restart.")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"build-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, user_request, base_repo_url, codename=None):
+        job_id = self.store.submit(user_request, base_repo_url, codename)
+        self._wake.set()
+        return job_id
+
+    def _work(self):
+        while not self._stopping.is_set():
+            job = self.store.claim_next()
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._run_job(job)
+
+    def _run_job(self, job):
+        # Imported here so the job store can be used without loading the agents.
+        from agents.coordinator import Coordinator
+        from services.headless_ui import HeadlessUI
+
+        job_id = job["id"]
+        workspace = self.store.latest_workspace(job["codename"]) if job["codename"] else None
+        workspace = workspace or os.path.join(self.jobs_dir, job_id)
+        os.makedirs(workspace, exist_ok=True)
+        self.store.update(job_id, workspace=workspace)
+
+        # Live progress (token counts, command output tails) replaces itself, so it is kept on the
+        # job row rather than in the log.
+        ui = HeadlessUI(sink=lambda level, text: self.store.append_log(job_id, level, text),
+                        progress_sink=lambda level, text: self.store.update(job_id, progress_level=level,
+                                                                            progress=text))
+        coordinator = None
+        try:
+            coordinator = Coordinator(ui, workspace_root=workspace)
+            succeeded = coordinator.run_frontend_build(job["user_request"], job["base_repo_url"], job["codename"])
+        except Exception as e:
+            self.store.append_log(job_id, "error", f"Build crashed: {e}")
+            succeeded = False
+        project = os.path.basename(coordinator.project_path) if coordinator and coordinator.project_path else None
+        if coordinator and coordinator.project_path:
+            from tools.file_writer import release_project_writer
+            release_project_writer(coordinator.project_path)
+        if succeeded:
+            self._finish(job_id, "succeeded", project=project, port=coordinator.dev_server.port,
+                         preview_url=coordinator.preview_url)
+        else:
+            error = next((text for level, text in reversed(ui.messages) if level == "error"), "Build failed.")
+            self._finish(job_id, "failed", project=project, error=error)
+
+    def _finish(self, job_id, status, **fields):
+        self.store.update(job_id, status=status, finished_at=time.time(), progress_level=None, progress=None,
+                          **fields)
+
+    @staticmethod
+    def _project_path(job):
+        return os.path.join(job["workspace"], job["project"]) if job.get("workspace") and job.get("project") else None
+
+    def preview(self, job):
+        """
+        Returns the running dev server of a finished job's project, or None. Showing a
+        preview counts as using it, so a server someone is looking at is not reaped as idle.
+        """
+        path = self._project_path(job)
+        if not path:
+            return None
+        from services.dev_servers import get_dev_server_manager
+        return get_dev_server_manager().touch(path)
+
+    def stop_preview(self, job_id):
+        """Stops the dev server of a job's project."""
+        path = self._project_path(self.store.get(job_id) or {})
+        if path:
+            from services.dev_servers import get_dev_server_manager
+            get_dev_server_manager().stop(path)
+
+    def shutdown(self, wait=True):
+        self._stopping.set()
+        self._wake.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
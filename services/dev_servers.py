@@ -0,0 +1,258 @@
+# services/dev_servers.py
+import collections
+import os
+import re
+import socket
+import subprocess
+import threading
+import time
+import config
+from tools.shell_tools import stop_process_group
+
+# Vite prints e.g. "  ➜  Local:   http://localhost:5173/" (with ANSI colours) once it is listening.
+LOCAL_URL_RE = re.compile(r"Local:\s+(https?://\S+)")
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+LOG_TAIL_LINES = 200
+MAX_LINE_BYTES = 8192
+PROBE_INTERVAL = 0.1
+# Seconds between background sweeps for idle servers.
+REAP_INTERVAL = 60
+
+
+class PortAllocator:
+    """Hands out dev-server ports from `[start, end]`, skipping ports something else is listening on."""
+
+    def __init__(self, start=None, end=None, host="127.0.0.1"):
+        self.start = start or config.DEV_SERVER_PORT
+        self.end = end or config.DEV_SERVER_PORT_MAX
+        self.host = host
+        self._assigned = set()
+        self._lock = threading.Lock()
+
+    def _is_free(self, port):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            try:
+                sock.bind((self.host, port))
+            except OSError:
+                return False
+        return True
+
+    def allocate(self, preferred=None):
+        """Returns `preferred` if it is free, else the first free port, or None when the range is taken."""
+        with self._lock:
+            candidates = ([preferred] if preferred else []) + list(range(self.start, self.end + 1))
+            for port in candidates:
+                if port not in self._assigned and self._is_free(port):
+                    self._assigned.add(port)
+                    return port
+        return None
+
+    def release(self, port):
+        with self._lock:
+            self._assigned.discard(port)
+
+
+def _port_open(port, host="127.0.0.1"):
+    try:
+        with socket.create_connection((host, port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
+class DevServer:
+    """
+    One `pnpm run dev` process. Its combined output is drained on a background thread
+    into a bounded tail, so a chatty server never blocks on a full pipe; readiness is
+    taken from Vite's "Local:" line or, failing that, a successful connect to the port.
+    """
+
+    def __init__(self, project_path, port):
+        self.project_path = project_path
+        self.port = port
+        self.url = None
+        self.started_at = time.monotonic()
+        self.ready_at = None
+        self.last_used = self.started_at
+        self.log = collections.deque(maxlen=LOG_TAIL_LINES)
+        self._ready = threading.Event()
+        self.process = subprocess.Popen(
+            ["pnpm", "run", "dev", "--port", str(port), "--strictPort"], cwd=project_path,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            start_new_session=os.name == "posix")
+        threading.Thread(target=self._drain, name=f"dev-server-{port}", daemon=True).start()
+
+    def _drain(self):
+        try:
+            for raw in iter(lambda: self.process.stdout.readline(MAX_LINE_BYTES), b""):
+                line = ANSI_RE.sub("", raw.decode("utf-8", errors="replace")).rstrip()
+                self.log.append(line)
+                match = LOCAL_URL_RE.search(line)
+                if match and not self._ready.is_set():
+                    self._mark_ready(match.group(1))
+        except (OSError, ValueError):
+            pass
+
+    def _mark_ready(self, url=None):
+        url = url or f"http://localhost:{self.port}/"
+        self.url = re.sub(r"//[^:/]+", f"//{config.PREVIEW_HOST}", url, count=1)
+        self.ready_at = time.monotonic()
+        self._ready.set()
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    @property
+    def ready(self):
+        return self._ready.is_set() and self.alive
+
+    @property
+    def time_to_ready(self):
+        return self.ready_at - self.started_at if self.ready_at else None
+
+    def wait_ready(self, timeout):
+        """Blocks until the server is listening, it exits, or `timeout` passes. Returns `self.ready`."""
+        deadline = time.monotonic() + timeout
+        while not self._ready.wait(PROBE_INTERVAL):
+            if not self.alive or time.monotonic() > deadline:
+                return False
+            if _port_open(self.port):
+                self._mark_ready()
+        return self.ready
+
+    def stop(self):
+        if self.alive:
+            stop_process_group(self.process)
+
+
+class DevServerManager:
+    """
+    Keeps at most `max_servers` dev servers running, one per project. A rebuild of a
+    project reuses its running server, so Vite's HMR picks up the rewritten files. Servers
+    not used for more than `idle_ttl` seconds (neither rebuilt nor viewed, see `touch`) are
+    stopped, and the least recently used one makes room when the limit or the port range
+    is reached.
+    """
+
+    def __init__(self, ports=None, max_servers=None, idle_ttl=None):
+        self.ports = ports or PortAllocator()
+        self.max_servers = max_servers or config.DEV_SERVER_MAX_RUNNING
+        self.idle_ttl = config.DEV_SERVER_IDLE_TTL if idle_ttl is None else idle_ttl
+        self.servers = collections.OrderedDict()  # absolute project path -> DevServer, least recent first
+        self._lock = threading.RLock()
+        self._reaper = None
+
+    def get(self, project_path):
+        """Returns the running server of `project_path`, or None."""
+        with self._lock:
+            server = self.servers.get(os.path.abspath(project_path))
+            return server if server and server.alive else None
+
+    def ensure(self, project_path, port=None, timeout=None):
+        """
+        Returns a ready server for `project_path` and whether it was reused, starting one
+        if needed. When it fails to start in time `server.ready` is False; (None, False)
+        means no port was free.
+        """
+        key = os.path.abspath(project_path)
+        while True:
+            with self._lock:
+                self._start_reaper()
+                server = self.servers.get(key)
+                if server and server.alive:
+                    self.servers.move_to_end(key)
+                    server.last_used = time.monotonic()
+                    return server, True
+                evicted = [self.servers.pop(key)] if server else []
+                evicted += self._pop_idle()
+                if not evicted and len(self.servers) < self.max_servers:
+                    allocated = self.ports.allocate(port)
+                    if allocated is not None:
+                        try:
+                            server = self.servers[key] = DevServer(project_path, allocated)
+                        except OSError:
+                            self.ports.release(allocated)
+                            raise
+                        break
+                    if not self.servers:
+                        return None, False
+                if not evicted:
+                    # Over the limit or out of ports: the least recently used server makes room.
+                    evicted.append(self.servers.popitem(last=False)[1])
+            # Stopping a server can take seconds; other callers must not wait on the lock meanwhile.
+            self._shutdown(evicted)
+        server.wait_ready(timeout or config.DEV_SERVER_READY_TIMEOUT)
+        return server, False
+
+    def touch(self, project_path):
+        """Marks the server of `project_path` as used now, so it is not reaped as idle. Returns it, or None."""
+        key = os.path.abspath(project_path)
+        with self._lock:
+            server = self.servers.get(key)
+            if not server or not server.alive:
+                return None
+            self.servers.move_to_end(key)
+            server.last_used = time.monotonic()
+            return server
+
+    def _pop_idle(self):
+        """Removes and returns the servers that exited or have been idle for longer than `idle_ttl`."""
+        now = time.monotonic()
+        idle = [key for key, server in self.servers.items()
+                if not server.alive or (self.idle_ttl and now - server.last_used > self.idle_ttl)]
+        return [self.servers.pop(key) for key in idle]
+
+    def _shutdown(self, servers):
+        """Stops servers already removed from `self.servers` and frees their ports. Called without the lock."""
+        for server in servers:
+            print(f"Stopping the dev server of '{server.project_path}' on port {server.port}.")
+            server.stop()
+            self.ports.release(server.port)
+
+    def stop(self, project_path):
+        with self._lock:
+            server = self.servers.pop(os.path.abspath(project_path), None)
+        self._shutdown([server] if server else [])
+
+    def reap(self):
+        """Stops servers that exited or have been idle for longer than `idle_ttl`."""
+        with self._lock:
+            idle = self._pop_idle()
+        self._shutdown(idle)
+
+    def _start_reaper(self):
+        if self._reaper is None and self.idle_ttl:
+            def sweep():
+                while True:
+                    time.sleep(REAP_INTERVAL)
+                    self.reap()
+            self._reaper = threading.Thread(target=sweep, name="dev-server-reaper", daemon=True)
+            self._reaper.start()
+
+    def stop_all(self):
+        with self._lock:
+            servers = list(self.servers.values())
+            self.servers.clear()
+        self._shutdown(servers)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_dev_server_manager():
+    """Returns the process-wide DevServerManager. AgentRuntime.shutdown stops its servers at exit."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = DevServerManager()
+        return _manager
+
+
+def stop_dev_servers():
+    """Stops every running dev server, if the manager was ever created."""
+    with _manager_lock:
+        manager = _manager
+    if manager is not None:
+        manager.stop_all()
@@ -0,0 +1,76 @@
+# services/headless_ui.py
+import contextlib
+import json
+
+
+class _Placeholder:
+    """
+    Like `st.empty()`: each write replaces the previous content instead of appending.
+    The new content is passed to `sink(level, text)`; repeated identical writes are not.
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.content = None
+
+    def _replace(self, level, text):
+        if self.content == (level, text):
+            return
+        self.content = (level, text)
+        if self.sink:
+            self.sink(level, text)
+
+    def markdown(self, body, **kwargs): self._replace("markdown", str(body))
+    def write(self, *args, **kwargs): self._replace("write", " ".join(str(a) for a in args))
+    def caption(self, body, **kwargs): self._replace("caption", str(body))
+    def info(self, body, **kwargs): self._replace("info", str(body))
+    def success(self, body, **kwargs): self._replace("success", str(body))
+    def error(self, body, **kwargs): self._replace("error", str(body))
+    def code(self, body, **kwargs): self._replace("code", str(body))
+
+
+class HeadlessUI:
+    """
+    Stands in for the `streamlit` module when the Coordinator runs without a browser
+    (benchmarks, background jobs). Implements the subset of the Streamlit API the
+    coordinator uses; messages are kept in `self.messages` and passed to `sink`. Live
+    content written to `empty()` placeholders goes to `progress_sink` instead.
+    """
+
+    def __init__(self, sink=None, echo=False, progress_sink=None):
+        self.sink = sink
+        self.echo = echo
+        self.progress_sink = progress_sink
+        self.messages = []
+
+    def _emit(self, level, text):
+        self.messages.append((level, text))
+        if self.sink:
+            self.sink(level, text)
+        if self.echo:
+            print(f"[{level}] {text}")
+
+    def info(self, body, **kwargs): self._emit("info", str(body))
+    def success(self, body, **kwargs): self._emit("success", str(body))
+    def error(self, body, **kwargs): self._emit("error", str(body))
+    def warning(self, body, **kwargs): self._emit("warning", str(body))
+    def write(self, *args, **kwargs): self._emit("write", " ".join(str(a) for a in args))
+    def caption(self, body, **kwargs): self._emit("caption", str(body))
+    def markdown(self, body, **kwargs): self._emit("markdown", str(body))
+    def code(self, body, **kwargs): self._emit("code", str(body))
+    def json(self, body, **kwargs): self._emit("json", json.dumps(body, default=str))
+    def table(self, data=None, **kwargs): self._emit("table", json.dumps(data, default=str))
+
+    def download_button(self, label, data=None, **kwargs):
+        return False
+
+    def balloons(self):
+        pass
+
+    def empty(self):
+        return _Placeholder(self.progress_sink)
+
+    @contextlib.contextmanager
+    def expander(self, label, expanded=False):
+        self._emit("section", str(label))
+        yield self
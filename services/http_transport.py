@@ -0,0 +1,290 @@
+# services/http_transport.py
+import json
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+import config
+
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+# Network failures worth another attempt; other request errors (invalid URL, redirect loops) fail at once.
+RETRYABLE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError)
+
+
+class TransportError(Exception):
+    """Raised when a request fails for good (non-retryable status or retries exhausted)."""
+
+    def __init__(self, message, status_code=None, body=None, attempts=1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+        self.attempts = attempts
+
+
+class TransportResponse:
+    """The decoded JSON body of a successful call plus transport-level metadata."""
+
+    def __init__(self, data, status_code, headers, attempts, elapsed, ttfb=None):
+        self.data = data
+        self.status_code = status_code
+        self.headers = headers
+        self.attempts = attempts
+        self.elapsed = elapsed
+        # Time from sending the final attempt until its response headers arrived.
+        self.ttfb = ttfb
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: delay = uniform(0, min(cap, base * 2**attempt))."""
+
+    def __init__(self, max_retries=None, backoff_base=None, backoff_max=None, retry_statuses=RETRYABLE_STATUSES):
+        self.max_retries = config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = config.HTTP_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = config.HTTP_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def should_retry(self, attempt, status_code=None):
+        if attempt > self.max_retries:
+            return False
+        return status_code is None or status_code in self.retry_statuses
+
+    def delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+
+def _parse_retry_after(headers):
+    value = headers.get("Retry-After") if headers else None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class HttpTransport:
+    """
+    A thread-safe JSON-over-HTTP transport backed by one pooled `requests.Session`,
+    so concurrent agents reuse keep-alive connections instead of paying a TCP+TLS
+    handshake per call. Transient failures are retried according to `retry_policy`.
+    """
+
+    def __init__(self, pool_size=None, retry_policy=None, connect_timeout=None, read_timeout=None):
+        self.pool_size = pool_size or config.HTTP_POOL_SIZE
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.connect_timeout = connect_timeout or config.HTTP_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or config.HTTP_READ_TIMEOUT
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size,
+                              pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _timeout(self, connect_timeout=None, read_timeout=None):
+        return (connect_timeout or self.connect_timeout, read_timeout or self.read_timeout)
+
+    def send_once(self, url, payload, headers, connect_timeout=None, read_timeout=None, stream=False):
+        """
+        Performs a single POST. Returns `(response, error)` where exactly one is set;
+        `error` is the requests exception of a failed request.
+        """
+        try:
+            response = self.session.post(url, headers=headers, data=json.dumps(payload), stream=stream,
+                                         timeout=self._timeout(connect_timeout, read_timeout))
+            return response, None
+        except requests.exceptions.RequestException as e:
+            return None, e
+
+    def _decide(self, response, error, attempt, decode=True, admission=None):
+        """
+        Returns ("ok", decoded body) | ("retry", delay) | ("fail", TransportError). A 429 of a
+        rate-limited call is always retried: its `admission` waits until the limit resets.
+        """
+        if error is not None:
+            if isinstance(error, RETRYABLE_ERRORS) and self.retry_policy.should_retry(attempt):
+                return "retry", self.retry_policy.delay(attempt)
+            return "fail", TransportError(f"{type(error).__name__}: {error}", attempts=attempt)
+
+        if response.status_code == 429 and admission is not None:
+            return "retry", 0.0
+        if response.status_code >= 400:
+            if self.retry_policy.should_retry(attempt, response.status_code):
+                return "retry", self.retry_policy.delay(attempt, _parse_retry_after(response.headers))
+            return "fail", TransportError(f"HTTP {response.status_code}", status_code=response.status_code,
+                                          body=response.text, attempts=attempt)
+        if not decode:
+            return "ok", None
+        try:
+            data = response.json()
+        except ValueError:
+            return "fail", TransportError("Response body is not valid JSON.", status_code=response.status_code,
+                                          body=response.text, attempts=attempt)
+        return "ok", data
+
+    @staticmethod
+    def _admit(admission, response=None):
+        """Waits for the rate limiter before an attempt, or reports an attempt's response to it."""
+        if admission is None:
+            return
+        if response is None:
+            admission.wait()
+        else:
+            admission.observe(response.status_code, response.headers)
+
+    def post_json(self, url, payload, headers, connect_timeout=None, read_timeout=None, admission=None):
+        """
+        POSTs `payload` as JSON with retries. Returns a TransportResponse or raises TransportError.
+        With an `admission` (see `services.rate_limiter`) every attempt waits for the rate limiter first.
+        """
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            self._admit(admission)
+            response, error = self.send_once(url, payload, headers, connect_timeout, read_timeout)
+            if response is not None:
+                self._admit(admission, response)
+            outcome, value = self._decide(response, error, attempt, admission=admission)
+            if outcome == "ok":
+                return TransportResponse(value, response.status_code, dict(response.headers),
+                                         attempt, time.perf_counter() - started, response.elapsed.total_seconds())
+            if outcome == "fail":
+                raise value
+            print(f"Retrying request to {url} in {value:.2f}s (attempt {attempt} failed: "
+                  f"{error or f'HTTP {response.status_code}'})")
+            time.sleep(value)
+
+    def open_stream(self, url, payload, headers, connect_timeout=None, stall_timeout=None, admission=None):
+        """
+        POSTs `payload` and returns the open `requests.Response` once the status line is OK,
+        retrying connection errors and retryable statuses and waiting for `admission` like `post_json`. The socket
+        read timeout is `stall_timeout`, so a server that goes silent fails fast.
+        The caller must close the response.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self._admit(admission)
+            response, error = self.send_once(url, payload, headers, connect_timeout,
+                                             stall_timeout or config.STREAM_STALL_TIMEOUT, stream=True)
+            if response is not None:
+                self._admit(admission, response)
+            outcome, value = self._decide(response, error, attempt, decode=False, admission=admission)
+            if outcome == "ok":
+                response.attempts = attempt
+                return response
+            if response is not None:
+                response.close()
+            if outcome == "fail":
+                raise value
+            print(f"Retrying request to {url} in {value:.2f}s (attempt {attempt} failed: "
+                  f"{error or f'HTTP {response.status_code}'})")
+            time.sleep(value)
+
+    @staticmethod
+    def iter_stream_lines(response, stall_timeout=None, deadline=None, is_activity=None):
+        """
+        Yields decoded lines from a streaming response and raises TransportError when the
+        stream stalls: no line for `stall_timeout` seconds (socket timeout), no line for which
+        `is_activity(line)` holds within `stall_timeout` (e.g. only keep-alive comments),
+        or the absolute `deadline` (a `time.monotonic()` value) passing.
+        """
+        stall_timeout = stall_timeout or config.STREAM_STALL_TIMEOUT
+        last_activity = time.monotonic()
+        try:
+            # chunk_size=None hands over each chunk as it arrives instead of waiting for 512 bytes.
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                now = time.monotonic()
+                if line and (is_activity is None or is_activity(line)):
+                    last_activity = now
+                elif now - last_activity > stall_timeout:
+                    raise TransportError(f"Stream stalled: no data for {stall_timeout:.0f}s.",
+                                         status_code=response.status_code)
+                if deadline is not None and now > deadline:
+                    raise TransportError("Stream exceeded its overall deadline.", status_code=response.status_code)
+                yield line
+        except requests.exceptions.RequestException as e:
+            raise TransportError(f"Stream stalled or dropped: {e}", status_code=response.status_code) from e
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncHttpTransport:
+    """
+    An asyncio front-end over a shared HttpTransport. Requests run on the
+    transport's connection pool in worker threads, backoff waits are `asyncio.sleep`
+    so they never hold a thread, and a per-event-loop semaphore caps in-flight calls
+    at the pool size.
+    """
+
+    def __init__(self, transport=None, max_in_flight=None):
+        self.transport = transport or get_transport()
+        self.max_in_flight = max_in_flight or self.transport.pool_size
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self):
+        import asyncio
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_in_flight)
+            return semaphore
+
+    async def post_json(self, url, payload, headers, connect_timeout=None, read_timeout=None, admission=None):
+        import asyncio  # imported on first use so synchronous callers never load it
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        attempt = 0
+        async with self._semaphore():
+            while True:
+                attempt += 1
+                await loop.run_in_executor(None, self.transport._admit, admission)
+                response, error = await loop.run_in_executor(
+                    None, self.transport.send_once, url, payload, headers, connect_timeout, read_timeout)
+                if response is not None:
+                    self.transport._admit(admission, response)
+                outcome, value = self.transport._decide(response, error, attempt, admission=admission)
+                if outcome == "ok":
+                    return TransportResponse(value, response.status_code, dict(response.headers),
+                                             attempt, time.perf_counter() - started, response.elapsed.total_seconds())
+                if outcome == "fail":
+                    raise value
+                print(f"Retrying request to {url} in {value:.2f}s (attempt {attempt} failed: "
+                      f"{error or f'HTTP {response.status_code}'})")
+                await asyncio.sleep(value)
+
+
+_transport = None
+_async_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Returns the process-wide HttpTransport, creating it on first use."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
+
+
+def get_async_transport():
+    """Returns the process-wide AsyncHttpTransport, sharing the pool of `get_transport()`."""
+    global _async_transport
+    transport = get_transport()
+    with _transport_lock:
+        if _async_transport is None:
+            _async_transport = AsyncHttpTransport(transport)
+        return _async_transport
+
+
+def close_transport():
+    """Closes the process-wide transport's connections, if it was ever created."""
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
@@ -0,0 +1,115 @@
+# services/model_routing.py
+import bisect
+import threading
+import config
+
+# Upper bounds (seconds) of the latency histogram buckets: 50ms to ~20min, 20% apart.
+BUCKET_BOUNDS = tuple(0.05 * 1.2 ** i for i in range(57))
+
+
+class ModelRoute:
+    """
+    The models an agent calls, primary first; the others are alternates for hedged and
+    fallback requests. `max_tokens` of None leaves the limit to the provider.
+    """
+
+    def __init__(self, name, models, temperature=0.2, max_tokens=None):
+        self.name = name
+        self.models = [m.strip() for m in models if m and m.strip()] or [config.MODEL_NAME]
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    @property
+    def primary(self):
+        return self.models[0]
+
+    @property
+    def alternates(self):
+        return self.models[1:]
+
+
+def route_for(agent_name):
+    """Returns the ModelRoute configured for `agent_name` in `config.MODEL_ROUTES`, or the default route."""
+    settings = config.MODEL_ROUTES.get(agent_name, {})
+    return ModelRoute(agent_name or "default", settings.get("models", [config.MODEL_NAME]),
+                      settings.get("temperature", 0.2), settings.get("max_tokens"))
+
+
+class LatencyHistogram:
+    """Call latencies in exponentially sized buckets, so percentiles cost O(buckets) and memory stays fixed."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the `q` quantile (0..1), or None without samples."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(BUCKET_BOUNDS[i], self.max) if i < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+
+class LatencyStats:
+    """
+    Per-model latency histograms of each route. Latencies depend as much on what a route
+    asks for as on the model, so a model shared by two agents gets a histogram per agent.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, model, seconds):
+        with self._lock:
+            self._histograms.setdefault((route, model), LatencyHistogram()).record(seconds)
+
+    def percentile(self, route, model, q):
+        with self._lock:
+            histogram = self._histograms.get((route, model))
+            return histogram.percentile(q) if histogram else None
+
+    def hedge_delay(self, route, model):
+        """
+        Seconds to wait for `model` before hedging: its `LLM_HEDGE_PERCENTILE` latency once
+        `LLM_HEDGE_MIN_SAMPLES` calls were seen, `LLM_HEDGE_INITIAL_DELAY` until then.
+        """
+        with self._lock:
+            histogram = self._histograms.get((route, model))
+            if histogram is None or histogram.count < config.LLM_HEDGE_MIN_SAMPLES:
+                return config.LLM_HEDGE_INITIAL_DELAY
+            return histogram.percentile(config.LLM_HEDGE_PERCENTILE)
+
+    def summary(self):
+        """One row per route and model with call count, mean, p50, p90, p99 and max latency."""
+        with self._lock:
+            return [{"route": route, "model": model, "count": h.count, "mean_s": round(h.total / h.count, 3),
+                     "p50_s": round(h.percentile(0.5), 3), "p90_s": round(h.percentile(0.9), 3),
+                     "p99_s": round(h.percentile(0.99), 3), "max_s": round(h.max, 3)}
+                    for (route, model), h in sorted(self._histograms.items())]
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_latency_stats():
+    """Returns the process-wide LatencyStats shared by all clients."""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = LatencyStats()
+        return _stats
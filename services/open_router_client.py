@@ -1,31 +1,86 @@
 # services/open_router_client.py
-import requests
+import contextvars
 import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 import config
+from services.http_transport import TransportError, get_transport, get_async_transport
+from services.model_routing import get_latency_stats, route_for
+from services.rate_limiter import get_rate_limiter
+from services.response_cache import CacheMiss, ResponseCache, get_response_cache
+from services.sse import StreamAssembler, iter_sse_data
+from services.tracing import span
+
+
+def _is_valid(response):
+    return bool(response and response.get("choices") and not response.get("error"))
+
+
+class ChatCompletion(dict):
+    """A completion response that remembers its cache key, so a caller that rejects it can discard the entry."""
+
+    cache_key = None
+
+
+class _LeaderProgress:
+    """Forwards the progress of whichever hedged attempt has generated the most output so far."""
+
+    def __init__(self, on_progress):
+        self.on_progress = on_progress
+        self.chars = {}
+        self._lock = threading.Lock()
+
+    def for_attempt(self, index, model):
+        if not self.on_progress:
+            return None
+
+        def forward(event):
+            with self._lock:
+                self.chars[index] = event["chars"]
+                leading = event["chars"] >= max(self.chars.values())
+            if leading or event["done"]:
+                self.on_progress(dict(event, model=model))
+        return forward
 
 
 class OpenRouterClient:
-    """A client for interacting with the OpenRouter chat completion API."""
+    """
+    A client for interacting with the OpenRouter chat completion API. Model, temperature
+    and max tokens come from the `route` (see `services.model_routing`).
+    """
 
-    def __init__(self):
-        self.api_url = "https://openrouter.ai/api/v1/chat/completions"
+    def __init__(self, transport=None, async_transport=None, cache=None, route=None, latency_stats=None,
+                 rate_limiter=None):
+        self.api_url = config.OPENROUTER_API_URL
         self.headers = {
             "Authorization": f"Bearer {config.OPENROUTER_API_KEY}",
             "Content-Type": "application/json",
             "HTTP-Referer": config.YOUR_SITE_URL,
             "X-Title": config.YOUR_SITE_NAME,
         }
+        # Transports are shared process-wide so every agent reuses the same connection pool.
+        self.transport = transport or get_transport()
+        self._async_transport = async_transport
+        self.cache = cache or get_response_cache()
+        self.route = route or route_for(None)
+        self.latency_stats = latency_stats or get_latency_stats()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
 
-    def create_chat_completion(self, messages, tools=None, temperature=0.2):
-        """
-        Calls the OpenRouter chat completion endpoint.
-        Returns the full, non-streaming response.
-        """
+    @property
+    def async_transport(self):
+        if self._async_transport is None:
+            self._async_transport = get_async_transport()
+        return self._async_transport
+
+    def _build_payload(self, messages, tools, temperature, model=None):
         payload = {
-            "model": config.MODEL_NAME,
+            "model": model or self.route.primary,
             "messages": messages,
-            "temperature": temperature,
+            "temperature": self.route.temperature if temperature is None else temperature,
         }
+        if self.route.max_tokens:
+            payload["max_tokens"] = self.route.max_tokens
         if tools:
             payload["tools"] = tools
             # Force the model to use a tool if any are provided
@@ -39,15 +94,302 @@ class OpenRouterClient:
                 "... (truncated)"
         print(json.dumps(debug_payload, indent=2))
         print("--------------------------------------\n")
+        return payload
+
+    @staticmethod
+    def _log_error(e):
+        print(f"Error calling OpenRouter API: {e} (after {e.attempts} attempt(s))")
+        if e.status_code is not None:
+            print(f"Status Code: {e.status_code}")
+            print(f"Response Body: {e.body}")
+
+    def create_chat_completion(self, messages, tools=None, temperature=None, connect_timeout=None, read_timeout=None,
+                               stream=None, on_progress=None):
+        """
+        Calls the OpenRouter chat completion endpoint.
+        Returns the full response (assembled from the event stream when streaming),
+        or None once retries are exhausted. `stream` defaults to `config.LLM_STREAMING`;
+        while streaming, `on_progress(event)` is called on every chunk. With
+        `config.LLM_HEDGING` and alternate models on the route, see `_hedged_complete`.
+        """
+        if stream is None:
+            stream = config.LLM_STREAMING
+        if temperature is None:
+            temperature = self.route.temperature
+        hedged = config.LLM_HEDGING and bool(self.route.alternates)
+        with span("llm", category="llm", model=self.route.primary, stream=bool(stream)) as trace:
+            if hedged:
+                response = self._hedged_complete(messages, tools, temperature, connect_timeout, read_timeout,
+                                                 stream, on_progress, trace)
+            else:
+                payload = self._build_payload(messages, tools, temperature)
+                response = self._complete(payload, messages, tools, temperature, connect_timeout, read_timeout,
+                                          stream, on_progress, trace)
+            usage = (response or {}).get("usage") or {}
+            trace.set(ok=response is not None, prompt_tokens=usage.get("prompt_tokens"),
+                      completion_tokens=usage.get("completion_tokens"))
+            return response
+
+    def _hedged_complete(self, messages, tools, temperature, connect_timeout, read_timeout, stream, on_progress, trace):
+        """
+        Calls the route's primary model; when it has not answered within its hedge delay
+        (see `LatencyStats.hedge_delay`), or fails, the next model is called as well. The
+        first valid response wins and the other streams are cancelled. A non-streaming
+        loser cannot be interrupted; it finishes in the background and its result is dropped.
+        The hedge delay runs from when the rate limiter admits an attempt, so time spent
+        queued behind the limit never launches a hedge.
+        """
+        models = self.route.models
+        progress = _LeaderProgress(on_progress)
+        executor = ThreadPoolExecutor(max_workers=len(models), thread_name_prefix="llm-hedge")
+        pending, cancels = {}, []
+        state = {"next": 0, "deadline": None, "admitted": None}
+
+        def attempt(index, model, cancel, on_admitted):
+            with span("llm_attempt", category="llm", model=model, hedge=index > 0) as attempt_trace:
+                response = self._complete(self._build_payload(messages, tools, temperature, model), messages, tools,
+                                          temperature, connect_timeout, read_timeout, stream,
+                                          progress.for_attempt(index, model), attempt_trace, cancel, on_admitted)
+                attempt_trace.set(ok=_is_valid(response), cancelled=cancel.is_set())
+                return response
+
+        def launch():
+            index = state["next"]
+            state["next"] += 1
+            model = models[index]
+            cancel = threading.Event()
+            cancels.append(cancel)
+            state["deadline"] = state["admitted"] = None
+            on_admitted = None
+            if state["next"] < len(models):
+                # Resolved with the admission time; the main loop then sets the hedge deadline.
+                admitted = state["admitted"] = Future()
+                on_admitted = lambda: admitted.set_result(time.monotonic())
+            pending[executor.submit(contextvars.copy_context().run, attempt, index, model, cancel,
+                                    on_admitted)] = model
+            if index:
+                print(f"--- Hedging {self.route.name} request with {model} ---")
 
+        launch()
+        response = None
         try:
-            response = requests.post(
-                self.api_url, headers=self.headers, data=json.dumps(payload), timeout=180)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            while pending:
+                admitted = state["admitted"]
+                if admitted is not None and admitted.done():
+                    state["admitted"] = None
+                    state["deadline"] = admitted.result() + self.latency_stats.hedge_delay(
+                        self.route.name, models[state["next"] - 1])
+                timeout = max(0.0, state["deadline"] - time.monotonic()) if state["deadline"] is not None else None
+                watched = set(pending) if state["admitted"] is None else {*pending, state["admitted"]}
+                done, _ = wait(watched, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+                for future in done:
+                    if future not in pending:
+                        continue  # the latest attempt was admitted; its deadline is set above
+                    model = pending.pop(future)
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        print(f"Error calling OpenRouter API with {model}: {e}")
+                        response = None
+                    if _is_valid(response):
+                        trace.set(model=model, hedged=state["next"] - 1)
+                        return response
+                if not pending and state["next"] < len(models):
+                    launch()  # every running attempt failed: fall back to the next model right away
+            trace.set(hedged=state["next"] - 1)
+            return response
+        finally:
+            for cancel in cancels:
+                cancel.set()
+            executor.shutdown(wait=False)
+
+    def _complete(self, payload, messages, tools, temperature, connect_timeout, read_timeout, stream, on_progress, trace,
+                  cancel=None, on_admitted=None):
+        try:
+            cache_key, cached = self._from_cache(payload, messages, tools, temperature, on_progress, trace)
+        except CacheMiss as e:
             print(f"Error calling OpenRouter API: {e}")
-            if e.response is not None:
-                print(f"Status Code: {e.response.status_code}")
-                print(f"Response Body: {e.response.text}")
             return None
+        if cached is not None:
+            return cached
+
+        # Calls queue here until their model is under its rate limit; the wait is not counted as latency.
+        admission = self.rate_limiter.admission(payload["model"], payload, cancel, on_admitted)
+        if admission is None and on_admitted is not None:
+            on_admitted()
+        started = time.perf_counter()
+        try:
+            if stream:
+                response = self._stream_completion(payload, on_progress, connect_timeout, read_timeout, trace, cancel,
+                                                   admission)
+            else:
+                result = self.transport.post_json(self.api_url, payload, self.headers,
+                                                  connect_timeout, read_timeout, admission)
+                trace.set(ttfb=result.ttfb, retries=result.attempts - 1)
+                response = result.data
+        except TransportError as e:
+            trace.set(retries=e.attempts - 1, error=str(e))
+            self._log_error(e)
+            return None
+        finally:
+            if admission is not None:
+                trace.set(rate_wait=round(admission.waited, 3))
+        return self._record(payload, response, admission, started, cache_key, cancel)
+
+    def _from_cache(self, payload, messages, tools, temperature, on_progress, trace):
+        """
+        Returns (cache key, cached response or None); the key is None when the cache is off.
+        Raises CacheMiss for a miss in read-only mode.
+        """
+        if not self.cache.enabled:
+            return None, None
+        cache_key = ResponseCache.make_key(payload["model"], messages, tools, temperature)
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+        trace.set(cached=1)
+        print(f"--- Served from LLM response cache ({cache_key[:12]}) ---")
+        if on_progress:
+            usage = cached.get("usage") or {}
+            on_progress({"elapsed": 0.0, "ttft": 0.0, "chars": 0, "tokens": usage.get("completion_tokens", 0),
+                         "attempt": 1, "done": True, "cached": True})
+        return cache_key, self._keyed(cached, cache_key)
+
+    def _record(self, payload, response, admission, started, cache_key, cancel=None):
+        """Settles the admission, records the call's latency and caches a valid response. Returns the response."""
+        if admission is not None:
+            admission.settle((response or {}).get("usage"))
+        latency = time.perf_counter() - started - (admission.waited if admission is not None else 0.0)
+        # A cancelled call took at least this long; counting it keeps the tail of the histogram honest.
+        if response is not None or (cancel is not None and cancel.is_set()):
+            self.latency_stats.record(self.route.name, payload["model"], latency)
+        if cache_key and _is_valid(response):
+            self.cache.put(cache_key, response, latency=latency)
+            response = self._keyed(response, cache_key)
+        return response
+
+    @staticmethod
+    def _keyed(response, cache_key):
+        response = ChatCompletion(response)
+        response.cache_key = cache_key
+        return response
+
+    def reject(self, response):
+        """
+        Called by agents for a response they could not use (unparseable plan, no tool call):
+        drops its cache entry so retrying the build asks the model again.
+        """
+        cache_key = getattr(response, "cache_key", None)
+        if cache_key:
+            print(f"--- Discarding rejected response from the LLM cache ({cache_key[:12]}) ---")
+            self.cache.discard(cache_key)
+
+    def _stream_completion(self, payload, on_progress, connect_timeout, read_timeout, trace, cancel=None,
+                           admission=None):
+        """
+        Streams a completion over SSE and assembles content and tool-call arguments as they
+        arrive. Progress events are dicts with `elapsed`, `ttft` (time to first generated
+        token, None until then), `chars`, `tokens` (estimated until usage arrives), `attempt`
+        and `done`. A stalled stream is aborted after `config.STREAM_STALL_TIMEOUT` seconds
+        and retried from scratch according to the transport's retry policy.
+        Timing and retry counts are recorded on the `trace` span. Once the `cancel` event is
+        set the stream is closed and None is returned. Every attempt waits for `admission`.
+        """
+        # include_usage asks for a final chunk with token counts.
+        payload = dict(payload, stream=True, stream_options={"include_usage": True})
+        policy = self.transport.retry_policy
+        started = time.perf_counter()
+        attempt = 0
+        retries = 0
+        while True:
+            attempt += 1
+            assembler = StreamAssembler()
+            ttft = None
+            response = None
+
+            def progress(done=False):
+                if on_progress:
+                    usage = assembler.usage or {}
+                    on_progress({"elapsed": time.perf_counter() - started, "ttft": ttft, "chars": assembler.chars,
+                                 "tokens": usage.get("completion_tokens", assembler.chars // 4),
+                                 "attempt": attempt, "done": done})
+
+            try:
+                response = self.transport.open_stream(self.api_url, payload, self.headers,
+                                                      connect_timeout, config.STREAM_STALL_TIMEOUT, admission)
+                retries += response.attempts - 1
+                trace.set(ttfb=response.elapsed.total_seconds(), retries=retries)
+                deadline = time.monotonic() + (read_timeout or self.transport.read_timeout)
+                lines = self.transport.iter_stream_lines(response, deadline=deadline,
+                                                         is_activity=lambda line: not line.startswith(":"))
+                for data in iter_sse_data(lines):
+                    if cancel is not None and cancel.is_set():
+                        return None
+                    if not assembler.feed_data(data):
+                        break
+                    if ttft is None and assembler.chars:
+                        ttft = time.perf_counter() - started
+                    progress()
+                progress(done=True)
+                trace.set(ttft=ttft)
+                return assembler.response()
+            except ValueError as e:
+                raise TransportError(f"Malformed stream: {e}", attempts=attempt) from e
+            except TransportError as e:
+                # Only failures after the stream opened are retried here; open_stream retries its own.
+                if response is None or not policy.should_retry(attempt):
+                    e.attempts = max(e.attempts, retries + attempt)
+                    raise
+                retries += 1
+                trace.set(retries=retries)
+                delay = policy.delay(attempt)
+                print(f"Stream attempt {attempt} failed ({e}); retrying in {delay:.2f}s")
+                if cancel is not None:
+                    if cancel.wait(delay):
+                        return None
+                else:
+                    time.sleep(delay)
+            finally:
+                if response is not None:
+                    response.close()
+
+    async def acreate_chat_completion(self, messages, tools=None, temperature=None, connect_timeout=None, read_timeout=None):
+        """
+        Asyncio variant of `create_chat_completion` sharing the same connection pool, response
+        cache, trace spans and latency stats. It calls the route's primary model without
+        streaming or hedging.
+        """
+        if temperature is None:
+            temperature = self.route.temperature
+        payload = self._build_payload(messages, tools, temperature)
+        with span("llm", category="llm", model=payload["model"], stream=False) as trace:
+            try:
+                cache_key, response = self._from_cache(payload, messages, tools, temperature, None, trace)
+                if response is None:
+                    response = await self._apost(payload, connect_timeout, read_timeout, trace, cache_key)
+            except CacheMiss as e:
+                print(f"Error calling OpenRouter API: {e}")
+                response = None
+            usage = (response or {}).get("usage") or {}
+            trace.set(ok=response is not None, prompt_tokens=usage.get("prompt_tokens"),
+                      completion_tokens=usage.get("completion_tokens"))
+            return response
+
+    async def _apost(self, payload, connect_timeout, read_timeout, trace, cache_key):
+        admission = self.rate_limiter.admission(payload["model"], payload)
+        started = time.perf_counter()
+        try:
+            result = await self.async_transport.post_json(self.api_url, payload, self.headers,
+                                                          connect_timeout, read_timeout, admission)
+            trace.set(ttfb=result.ttfb, retries=result.attempts - 1)
+        except TransportError as e:
+            trace.set(retries=e.attempts - 1, error=str(e))
+            self._log_error(e)
+            return None
+        finally:
+            if admission is not None:
+                trace.set(rate_wait=round(admission.waited, 3))
+        return self._record(payload, result.data, admission, started, cache_key)
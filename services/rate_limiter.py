@@ -0,0 +1,269 @@
+# services/rate_limiter.py
+import collections
+import email.utils
+import threading
+import time
+import config
+from services.http_transport import TransportError
+from services.model_routing import LatencyHistogram
+
+# Completion tokens assumed for a model until a response has reported its usage.
+DEFAULT_COMPLETION_TOKENS = 1000
+# Cool-down after a 429 that carries no Retry-After or reset header; doubles with each consecutive 429.
+# From the second consecutive 429 on it is also the least cool-down, whatever the headers say.
+DEFAULT_COOLDOWN = 1.0
+MAX_COOLDOWN = 60.0
+# Requests reach the provider a little after they are admitted, so admitted requests are kept this many
+# seconds longer than the window; otherwise the provider's window can see one request too many.
+WINDOW_MARGIN = 0.5
+
+
+class RateLimitExceeded(TransportError):
+    """Raised when a call would wait longer than `RATE_LIMIT_MAX_WAIT` for its model, or was cancelled while queued."""
+
+
+def estimate_tokens(payload, completion_tokens=DEFAULT_COMPLETION_TOKENS):
+    """Rough token count of a chat completion call: ~4 characters per prompt token plus the expected completion."""
+    prompt = sum(len(m.get("content") or "") for m in payload.get("messages", []))
+    prompt += len(str(payload.get("tools") or ""))
+    return prompt // 4 + min(completion_tokens, payload.get("max_tokens") or completion_tokens)
+
+
+def _parse_reset(headers):
+    """
+    Seconds until the provider's limit resets, from `Retry-After` (seconds or HTTP date) or, once
+    `X-RateLimit-Remaining` is 0, `X-RateLimit-Reset` (epoch milliseconds or seconds, or a delta).
+    """
+    value = headers.get("Retry-After")
+    if value is not None:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+    if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+        try:
+            reset = float(headers["X-RateLimit-Reset"])
+        except ValueError:
+            return None
+        if reset > 1e11:
+            reset /= 1000.0
+        return max(0.0, reset - time.time()) if reset > 1e9 else reset
+    return None
+
+
+class _ModelState:
+    """Sliding window of the requests admitted for one model, its FIFO queue and its counters."""
+
+    def __init__(self, rpm, tpm):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = collections.deque()  # [admitted at, tokens] per request
+        self.queue = collections.deque()
+        self.blocked_until = 0.0
+        self.consecutive_429 = 0
+        self.completion_tokens = DEFAULT_COMPLETION_TOKENS
+        self.waits = LatencyHistogram()
+        self.admitted = 0
+        self.queued = 0
+        self.rate_limited = 0
+        self.max_queue_depth = 0
+
+    def delay(self, now, tokens, window):
+        """Seconds until a request of `tokens` fits in the window and the model is not blocked; 0 admits it."""
+        window += WINDOW_MARGIN
+        while self.window and self.window[0][0] <= now - window:
+            self.window.popleft()
+        wait = self.blocked_until - now
+        if self.rpm and len(self.window) >= self.rpm:
+            wait = max(wait, self.window[len(self.window) - self.rpm][0] + window - now)
+        if self.tpm and self.window:
+            excess = sum(n for _, n in self.window) + tokens - self.tpm
+            for admitted_at, n in self.window:
+                if excess <= 0:
+                    break
+                excess -= n
+                wait = max(wait, admitted_at + window - now)
+        return max(0.0, wait)
+
+
+class Admission:
+    """
+    One call's passage through the limiter. The transport calls `wait()` before and
+    `observe()` after every attempt, so retries are admitted and accounted like new requests.
+    """
+
+    def __init__(self, limiter, model, tokens, cancel=None, on_admitted=None):
+        self.limiter = limiter
+        self.model = model
+        self.tokens = tokens
+        self.cancel = cancel
+        # Called once, when the first attempt is admitted.
+        self.on_admitted = on_admitted
+        self.waited = 0.0
+        self._entry = None
+
+    def wait(self):
+        # The wait budget covers the whole call, so a provider that keeps answering 429 cannot hold it forever.
+        self._entry, waited = self.limiter._acquire(self.model, self.tokens, self.cancel,
+                                                    self.limiter.max_wait - self.waited)
+        self.waited += waited
+        if self.on_admitted is not None:
+            on_admitted, self.on_admitted = self.on_admitted, None
+            on_admitted()
+
+    def observe(self, status_code, headers):
+        self.limiter._observe(self.model, self._entry, status_code, headers or {})
+
+    def settle(self, usage):
+        """Replaces the estimate with the tokens the response reported using."""
+        if usage and self._entry is not None:
+            self.limiter._settle(self.model, self._entry, usage)
+
+
+class RateLimiter:
+    """
+    Client-side admission control for LLM calls. Each model has a sliding window of
+    `RATE_LIMIT_WINDOW` seconds holding at most its requests-per-window and estimated
+    tokens-per-window limits (`RATE_LIMIT_RPM`, `RATE_LIMIT_TPM`, `RATE_LIMITS`), so calls
+    are spaced to stay just under the provider's limits instead of provoking 429s. When
+    the provider answers 429 or reports an exhausted limit, the model is blocked until the
+    `Retry-After`/reset time. Callers wait in arrival order per model.
+    """
+
+    def __init__(self, enabled=None, window=None, max_wait=None):
+        self.enabled = config.RATE_LIMIT_ENABLED if enabled is None else enabled
+        self.window = window or config.RATE_LIMIT_WINDOW
+        self.max_wait = config.RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+        self._models = {}
+        self._condition = threading.Condition()
+
+    def _state(self, model):
+        state = self._models.get(model)
+        if state is None:
+            rpm, tpm = config.RATE_LIMITS.get(model, (config.RATE_LIMIT_RPM, config.RATE_LIMIT_TPM))
+            state = self._models[model] = _ModelState(rpm, tpm)
+        return state
+
+    def admission(self, model, payload, cancel=None, on_admitted=None):
+        """Returns an Admission for a call to `model`, or None when rate limiting is off."""
+        if not self.enabled:
+            return None
+        with self._condition:
+            completion_tokens = self._state(model).completion_tokens
+        return Admission(self, model, estimate_tokens(payload, completion_tokens), cancel, on_admitted)
+
+    def _acquire(self, model, tokens, cancel, max_wait):
+        """
+        Blocks until `model` has room for `tokens`, in arrival order. Returns (window entry,
+        seconds waited); raises RateLimitExceeded when that would take longer than `max_wait`.
+        """
+        started = time.monotonic()
+        ticket = object()
+        with self._condition:
+            state = self._state(model)
+            state.queue.append(ticket)
+            state.max_queue_depth = max(state.max_queue_depth, len(state.queue))
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = state.delay(now, tokens, self.window) if state.queue[0] is ticket else None
+                    if delay == 0.0:
+                        entry = [now, tokens]
+                        state.window.append(entry)
+                        break
+                    if cancel is not None and cancel.is_set():
+                        raise RateLimitExceeded(f"Cancelled while queued for {model}.")
+                    if now - started + (delay or 0.0) > max_wait:
+                        raise RateLimitExceeded(
+                            f"Rate limit of {model}: would wait more than {self.max_wait:.0f}s in total "
+                            f"({len(state.queue)} call(s) queued).", status_code=429)
+                    # Waiters behind the head are woken when it is admitted, and at the latest when their
+                    # own max_wait runs out, so a long cool-down cannot hold them past it; cancellable ones poll.
+                    remaining = max(0.001, max_wait - (now - started))
+                    timeout = remaining if delay is None else min(delay, remaining)
+                    if cancel is not None:
+                        timeout = min(timeout, 0.25)
+                    self._condition.wait(timeout)
+            finally:
+                state.queue.remove(ticket)
+                self._condition.notify_all()
+            waited = time.monotonic() - started
+            state.admitted += 1
+            state.waits.record(waited)
+            if waited >= 0.001:
+                state.queued += 1
+        if waited >= 0.001:
+            print(f"--- Rate limiter held a {model} call for {waited:.2f}s ---")
+        return entry, waited
+
+    def _observe(self, model, entry, status_code, headers):
+        now = time.monotonic()
+        with self._condition:
+            state = self._state(model)
+            reset = _parse_reset(headers)
+            if status_code == 429:
+                state.rate_limited += 1
+                state.consecutive_429 += 1
+                if entry is not None:
+                    entry[1] = 0  # a rejected request generated nothing
+                cooldown = min(MAX_COOLDOWN, DEFAULT_COOLDOWN * 2 ** (state.consecutive_429 - 1))
+                if reset is None:
+                    reset = cooldown
+                elif state.consecutive_429 > 1:
+                    # A provider that keeps answering 429 with Retry-After: 0 must not get an immediate retry loop.
+                    reset = max(reset, cooldown)
+            elif status_code < 400:
+                state.consecutive_429 = 0
+            if reset is not None and (status_code == 429 or status_code < 400):
+                state.blocked_until = max(state.blocked_until, now + reset)
+            self._condition.notify_all()
+
+    def _settle(self, model, entry, usage):
+        with self._condition:
+            state = self._state(model)
+            if usage.get("total_tokens") is not None:
+                entry[1] = usage["total_tokens"]
+            if usage.get("completion_tokens"):
+                # Moving average of the completion size, used to estimate the next calls.
+                state.completion_tokens = int(0.8 * state.completion_tokens + 0.2 * usage["completion_tokens"])
+            self._condition.notify_all()
+
+    def queue_depth(self, model=None):
+        """Calls currently waiting for `model`, or for any model."""
+        with self._condition:
+            states = [self._models[model]] if model in self._models else [] if model else self._models.values()
+            return sum(len(state.queue) for state in states)
+
+    def totals(self):
+        """Counters summed over all models, for reporting the difference between two snapshots."""
+        with self._condition:
+            states = list(self._models.values())
+            return {"admitted": sum(s.admitted for s in states), "queued": sum(s.queued for s in states),
+                    "wait_seconds": sum(s.waits.total for s in states),
+                    "rate_limited": sum(s.rate_limited for s in states)}
+
+    def summary(self):
+        """One row per model with its limits, calls admitted and queued, wait percentiles, queue depth and 429s."""
+        with self._condition:
+            return [{"model": model, "rpm": s.rpm, "tpm": s.tpm, "admitted": s.admitted, "queued": s.queued,
+                     "wait_p50_s": round(s.waits.percentile(0.5) or 0.0, 3),
+                     "wait_p99_s": round(s.waits.percentile(0.99) or 0.0, 3), "wait_max_s": round(s.waits.max, 3),
+                     "queue_depth": len(s.queue), "max_queue_depth": s.max_queue_depth,
+                     "rate_limited": s.rate_limited}
+                    for model, s in sorted(self._models.items())]
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Returns the process-wide RateLimiter shared by all clients."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
@@ -0,0 +1,184 @@
+# services/response_cache.py
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import config
+
+CACHE_MODES = ("off", "readwrite", "replay")
+# Temporary files are renamed into place by a concurrent put; only older ones are leftovers of a crash.
+TMP_FILE_GRACE_SECONDS = 3600
+
+
+class CacheMiss(Exception):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+class ResponseCache:
+    """
+    A content-addressed on-disk cache of chat completion responses.
+    Entries are gzip-compressed JSON files named by the SHA-256 of the request
+    (model, messages, tools, temperature) and sharded by the first two hex digits.
+    A hit refreshes the entry's mtime, so eviction by oldest mtime is LRU.
+    Modes: "off" bypasses the cache, "readwrite" serves hits and records misses,
+    "replay" serves hits and raises CacheMiss instead of calling the API.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, max_age=None, mode=None):
+        self.cache_dir = cache_dir or config.LLM_CACHE_DIR
+        self.max_bytes = config.LLM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.max_age = config.LLM_CACHE_MAX_AGE if max_age is None else max_age
+        self.mode = mode or config.LLM_CACHE_MODE
+        if self.mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{self.mode}', expected one of {CACHE_MODES}.")
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "discarded": 0,
+                       "saved_seconds": 0.0}
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    @staticmethod
+    def make_key(model, messages, tools=None, temperature=None):
+        canonical = json.dumps({"model": model, "messages": messages, "tools": tools or None,
+                                "temperature": temperature}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json.gz")
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get(self, key):
+        """Returns the cached response for `key`, or None (raising CacheMiss in replay mode)."""
+        path = self._path(key)
+        try:
+            if self.max_age and time.time() - os.path.getmtime(path) > self.max_age:
+                self._remove(path)
+                raise FileNotFoundError(path)
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self._count("misses")
+            if self.mode == "replay":
+                raise CacheMiss(f"No recorded response for request {key[:12]} in replay mode.")
+            return None
+        self._count("hits")
+        self._count("saved_seconds", entry.get("latency", 0.0))
+        return entry["response"]
+
+    def put(self, key, response, latency=0.0):
+        """Stores `response` atomically, then evicts expired and least recently used entries."""
+        if self.mode != "readwrite":
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {"key": key, "created": time.time(), "latency": latency, "response": response}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+                f.write(json.dumps(entry, separators=(",", ":")).encode("utf-8"))
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: could not write LLM cache entry {key[:12]}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._count("stores")
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += os.path.getsize(path) - old_size
+            over_budget = self._total_bytes is None or self._total_bytes > self.max_bytes
+        if over_budget:
+            self.prune()
+
+    def discard(self, key):
+        """Deletes the entry of a response its caller rejected, so the next identical request calls the API."""
+        if self.mode != "readwrite":
+            return
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._stats["discarded"] += 1
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._stats["evictions"] += 1
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def prune(self):
+        """
+        Deletes entries older than `max_age`, then the least recently used until under `max_bytes`.
+        Temporary files of writes in progress are left alone.
+        """
+        entries = []
+        now = time.time()
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp"):
+                    if now - stat.st_mtime > TMP_FILE_GRACE_SECONDS:
+                        with contextlib.suppress(OSError):
+                            os.remove(path)
+                    continue
+                if self.max_age and now - stat.st_mtime > self.max_age:
+                    self._remove(path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+        with self._lock:
+            self._total_bytes = total
+
+    def stats(self):
+        """Returns a snapshot of hit/miss counters and the API latency saved by hits."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Returns the process-wide ResponseCache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
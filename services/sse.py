@@ -0,0 +1,100 @@
+# services/sse.py
+import json
+
+
+def iter_sse_data(lines):
+    """
+    Yields the `data:` payloads of a server-sent event stream, one per event.
+    Comment lines (": keep-alive") and other fields are skipped; multi-line data
+    fields are joined with newlines as the SSE spec requires.
+    """
+    buffer = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line:
+            if buffer:
+                yield "\n".join(buffer)
+                buffer = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            buffer.append(value[1:] if value.startswith(" ") else value)
+    if buffer:
+        yield "\n".join(buffer)
+
+
+class StreamAssembler:
+    """
+    Rebuilds a non-streaming chat completion from OpenAI-style `chat.completion.chunk`
+    deltas. Tool calls arrive as fragments keyed by `index`: the first fragment
+    carries the id and function name, later ones append to `function.arguments`.
+    """
+
+    def __init__(self):
+        self.content = []
+        self.tool_calls = {}
+        self.role = "assistant"
+        self.finish_reason = None
+        self.usage = None
+        self.model = None
+        self.id = None
+        self.chars = 0
+
+    def feed(self, chunk):
+        """Applies one decoded chunk. Returns the number of generated characters it added."""
+        if chunk.get("error"):
+            raise ValueError(f"Stream returned an error: {chunk['error']}")
+        self.id = self.id or chunk.get("id")
+        self.model = self.model or chunk.get("model")
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+
+        added = 0
+        for choice in chunk.get("choices") or []:
+            if choice.get("index", 0) != 0:
+                continue
+            delta = choice.get("delta") or {}
+            if delta.get("role"):
+                self.role = delta["role"]
+            if delta.get("content"):
+                self.content.append(delta["content"])
+                added += len(delta["content"])
+            for fragment in delta.get("tool_calls") or []:
+                call = self.tool_calls.setdefault(fragment.get("index", 0), {
+                    "id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+                if fragment.get("id"):
+                    call["id"] = fragment["id"]
+                function = fragment.get("function") or {}
+                if function.get("name"):
+                    call["function"]["name"] += function["name"]
+                if function.get("arguments"):
+                    call["function"]["arguments"] += function["arguments"]
+                    added += len(function["arguments"])
+            if choice.get("finish_reason"):
+                self.finish_reason = choice["finish_reason"]
+        self.chars += added
+        return added
+
+    def feed_data(self, data):
+        """Applies one raw SSE data payload. Returns False once the `[DONE]` sentinel is seen."""
+        if data.strip() == "[DONE]":
+            return False
+        self.feed(json.loads(data))
+        return True
+
+    def response(self):
+        """Returns the assembled response in the same shape as a non-streaming completion."""
+        message = {"role": self.role, "content": "".join(self.content)}
+        if self.tool_calls:
+            message["tool_calls"] = [self.tool_calls[i] for i in sorted(self.tool_calls)]
+        response = {
+            "id": self.id,
+            "model": self.model,
+            "choices": [{"index": 0, "message": message, "finish_reason": self.finish_reason}],
+        }
+        if self.usage:
+            response["usage"] = self.usage
+        return response
@@ -0,0 +1,169 @@
+# services/tracing.py
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+_current_tracer = contextvars.ContextVar("current_tracer", default=None)
+
+# Numeric span attributes that are summed per span name in `Tracer.summary()`.
+SUMMED_ATTRIBUTES = ("prompt_tokens", "completion_tokens", "retries", "cached", "rate_wait")
+
+
+def prune_traces(directory, keep):
+    """Deletes all but the `keep` most recently written trace files in `directory`."""
+    try:
+        paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json")]
+        paths.sort(key=os.path.getmtime, reverse=True)
+    except OSError:
+        return
+    for path in paths[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class _NoopSpan:
+    """Returned when tracing is off; every operation is a no-op."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, category, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.attrs = attrs
+        self.start = None
+        self.end = None
+        self.thread_id = None
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+
+class Tracer:
+    """
+    Collects timed spans for one build. Spans from any thread are recorded; the
+    tracer is found through a context variable (see `use_tracer` and `span`), so
+    worker threads must run in a copied context to be traced.
+    """
+
+    def __init__(self, enabled=True, name="build"):
+        self.enabled = enabled
+        self.name = name
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def span(self, name, category="build", **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, category, attrs)
+
+    def _finish(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_chrome_trace(self):
+        """Returns the spans as Chrome trace / Perfetto JSON ("X" complete events, microseconds)."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        thread_ids = {}
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": self.name}}]
+        for span in sorted(spans, key=lambda s: s.start):
+            if span.thread_id not in thread_ids:
+                thread_ids[span.thread_id] = len(thread_ids) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_ids[span.thread_id],
+                               "args": {"name": f"thread-{thread_ids[span.thread_id]}"}})
+            events.append({
+                "name": span.name, "cat": span.category, "ph": "X", "pid": pid,
+                "tid": thread_ids[span.thread_id],
+                "ts": round((span.start - self.origin) * 1e6, 1),
+                "dur": round(span.duration * 1e6, 1),
+                "args": {k: v for k, v in span.attrs.items() if isinstance(v, (str, int, float, bool, type(None)))},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path, keep=None):
+        """Writes the Chrome trace to `path`; with `keep`, only the newest `keep` traces of its directory remain."""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        if keep:
+            prune_traces(directory, keep)
+        return path
+
+    def summary(self):
+        """Per span name: count, total/mean/max seconds, and summed token/retry attributes."""
+        rows = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            row = rows.setdefault(span.name, {"span": span.name, "count": 0, "total_s": 0.0, "max_s": 0.0})
+            row["count"] += 1
+            row["total_s"] += span.duration
+            row["max_s"] = max(row["max_s"], span.duration)
+            for key in SUMMED_ATTRIBUTES:
+                value = span.attrs.get(key)
+                if isinstance(value, (int, float)):
+                    row[key] = row.get(key, 0) + value
+        for row in rows.values():
+            row["mean_s"] = row["total_s"] / row["count"]
+            for key in ("total_s", "max_s", "mean_s"):
+                row[key] = round(row[key], 3)
+        return sorted(rows.values(), key=lambda r: -r["total_s"])
+
+
+def current_tracer():
+    return _current_tracer.get()
+
+
+@contextlib.contextmanager
+def use_tracer(tracer):
+    """Makes `tracer` the active tracer for the current context."""
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+def span(name, category="build", **attrs):
+    """Opens a span on the active tracer, or returns a shared no-op span when there is none."""
+    tracer = _current_tracer.get()
+    if tracer is None or not tracer.enabled:
+        return NOOP_SPAN
+    return Span(tracer, name, category, attrs)
@@ -1,22 +1,28 @@
 # tools/file_system_tools.py
-import os
+from tools.file_writer import get_project_writer
 
 
 def write_react_component(file_path: str, code: str, project_path: str) -> str:
     """Writes a React component file within the specified project's 'src' directory."""
-    clean_file_path = file_path.strip()
-
-    if not clean_file_path.startswith("src/"):
-        clean_file_path = os.path.join("src", clean_file_path)
-
     try:
-        full_path = os.path.join(project_path, clean_file_path)
-        os.makedirs(os.path.dirname(full_path), exist_ok=True)
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(code)
-        return f"Successfully wrote component to {clean_file_path}"
+        rel_path, status = get_project_writer(project_path).write(file_path, code)
     except Exception as e:
         return f"Error writing file: {e}"
+    if status == "unchanged":
+        return f"Successfully wrote component to src/{rel_path} (content unchanged, file left as is)"
+    if status == "staged":
+        return f"Staged component for src/{rel_path}; it is written when the current build step finishes"
+    return f"Successfully wrote component to src/{rel_path}"
+
+
+def bind_write_react_component(project_path):
+    """
+    Returns write_react_component with `project_path` fixed, as handed to the model: the
+    project is chosen by the caller, and a call that passes its own `project_path` fails.
+    """
+    def write(file_path: str, code: str) -> str:
+        return write_react_component(file_path, code, project_path)
+    return write
 
 
 write_react_component_tool_def = {
@@ -28,9 +34,8 @@ write_react_component_tool_def = {
             "type": "object",
             "properties": {
                 "file_path": {"type": "string", "description": "The relative path from the 'src' directory. E.g., 'components/MyComponent.tsx' or 'App.tsx'."},
-                "code": {"type": "string", "description": "The complete, well-formed React/TSX code for the component."},
-                "project_path": {"type": "string", "description": "The root path of the project workspace."}
-            }, "required": ["file_path", "code", "project_path"]
+                "code": {"type": "string", "description": "The complete, well-formed React/TSX code for the component."}
+            }, "required": ["file_path", "code"]
         }
     }
 }
@@ -0,0 +1,194 @@
+# tools/file_writer.py
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+MANIFEST_DIR = ".frontend_agent"
+MANIFEST_FILE = "write_manifest.json"
+MANIFEST_VERSION = 1
+SOURCE_DIR = "src"
+
+
+class PathEscapeError(ValueError):
+    """Raised for a generated file path that resolves outside the project's `src/` directory."""
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _atomic_write(path, data):
+    """Writes `data` next to `path` and renames it into place, so readers never see a partial file."""
+    directory, name = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    # Dot-prefixed so file watchers that skip hidden files ignore it.
+    tmp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+class ProjectWriter:
+    """
+    Writes generated files under a project's `src/` directory. Files are written to a
+    temporary file and renamed into place; content that matches what is on disk is not
+    rewritten, so the dev server's watcher only rebuilds for real changes. Inside
+    `batch()` writes are staged and flushed together when the outermost batch ends, the
+    last write of a file winning. Every written file and its hash is recorded in
+    `.frontend_agent/write_manifest.json`.
+    """
+
+    def __init__(self, project_path):
+        self.project_path = os.path.abspath(project_path)
+        self.src_dir = os.path.join(self.project_path, SOURCE_DIR)
+        self.files = {}
+        self._staged = {}
+        self._depth = 0
+        self._lock = threading.RLock()
+        self._load()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.project_path, MANIFEST_DIR, MANIFEST_FILE)
+
+    def _load(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.files = data.get("files", {})
+
+    def _save(self):
+        data = json.dumps({"version": MANIFEST_VERSION, "files": self.files}, indent=2).encode("utf-8")
+        _atomic_write(self.manifest_path, data)
+
+    def resolve(self, file_path):
+        """
+        Returns `(relative path, absolute path)` for a path relative to `src/` (a leading
+        `src/` is accepted). Raises PathEscapeError when it would land outside `src/`.
+        """
+        clean = file_path.strip().replace("\\", "/")
+        if clean.startswith(f"{SOURCE_DIR}/"):
+            clean = clean[len(SOURCE_DIR) + 1:]
+        if not clean or os.path.isabs(clean):
+            raise PathEscapeError(f"'{file_path}' is not a path inside {SOURCE_DIR}/.")
+        full_path = os.path.realpath(os.path.join(self.src_dir, clean))
+        src_dir = os.path.realpath(self.src_dir)
+        if os.path.commonpath([full_path, src_dir]) != src_dir or full_path == src_dir:
+            raise PathEscapeError(f"'{file_path}' resolves outside {SOURCE_DIR}/.")
+        return os.path.relpath(full_path, src_dir).replace(os.sep, "/"), full_path
+
+    def _unchanged(self, rel_path, full_path, digest):
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return False
+        entry = self.files.get(rel_path)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"] == digest
+        try:
+            with open(full_path, "rb") as f:
+                return _sha256(f.read()) == digest
+        except OSError:
+            return False
+
+    def write(self, file_path, content):
+        """
+        Writes `content` to `src/<file_path>`. Returns `(relative path, status)` where status
+        is "written", "unchanged" or, inside a batch, "staged".
+        """
+        rel_path, full_path = self.resolve(file_path)
+        data = content.encode("utf-8")
+        with self._lock:
+            if self._depth:
+                self._staged[rel_path] = (full_path, data)
+                return rel_path, "staged"
+            status = self._write_one(rel_path, full_path, data)
+            if status == "written":
+                self._save()
+            return rel_path, status
+
+    def _write_one(self, rel_path, full_path, data):
+        digest = _sha256(data)
+        if self._unchanged(rel_path, full_path, digest):
+            return "unchanged"
+        _atomic_write(full_path, data)
+        stat = os.stat(full_path)
+        self.files[rel_path] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                "written_at": time.time()}
+        return "written"
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Stages writes until the outermost batch exits, then flushes them at once. Yields a
+        dict that is filled with the flush outcome: relative path -> status or error message.
+        """
+        outcome = {}
+        with self._lock:
+            self._depth += 1
+        try:
+            yield outcome
+        finally:
+            with self._lock:
+                self._depth -= 1
+                if not self._depth:
+                    outcome.update(self.flush())
+
+    def flush(self):
+        """Writes every staged file and saves the manifest once. Returns relative path -> status or error."""
+        with self._lock:
+            staged, self._staged = self._staged, {}
+            outcome = {}
+            for rel_path, (full_path, data) in staged.items():
+                try:
+                    outcome[rel_path] = self._write_one(rel_path, full_path, data)
+                except OSError as e:
+                    outcome[rel_path] = f"Error writing file: {e}"
+            if "written" in outcome.values():
+                try:
+                    self._save()
+                except OSError as e:
+                    print(f"Warning: could not save the write manifest of {self.project_path}: {e}")
+            return outcome
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_project_writer(project_path):
+    """
+    Returns the shared ProjectWriter of the project at `project_path`. Spellings of the same
+    directory (relative, trailing slash, symlinked) share one writer, and so one batch.
+    """
+    key = os.path.realpath(project_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = ProjectWriter(key)
+        return writer
+
+
+def release_project_writer(project_path):
+    """
+    Forgets the shared ProjectWriter of `project_path` once its build is done, so a
+    long-running process does not keep one per workspace. A later write loads the
+    manifest from disk again. A writer inside a batch is kept.
+    """
+    key = os.path.realpath(project_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is not None and not writer._depth:
+            del _writers[key]
@@ -1,25 +1,230 @@
 # tools/project_scanner.py
+import hashlib
+import json
 import os
+import re
+import threading
+import uuid
+from tools.template_index import estimate_tokens
 
+IGNORE_DIRS = {'node_modules', '.git', 'dist', '.vscode', '__pycache__', '.frontend_agent'}
+INDEX_DIR = ".frontend_agent"
+INDEX_FILE = "project_index.json"
+INDEX_VERSION = 1
+SOURCE_EXTENSIONS = (".ts", ".tsx")
+# Files larger than this are listed but not hashed or parsed.
+MAX_HASH_BYTES = 1024 * 1024
+# Scanning stops after this many entries so a stray huge directory can't stall a build.
+MAX_ENTRIES = 20000
 
-def read_directory_structure(root_dir: str) -> str:
+_DECLARATION_EXPORT_RE = re.compile(
+    r"^\s*export\s+(default\s+)?(?:declare\s+)?(?:async\s+)?"
+    r"(?:function\*?|class|const|let|var|interface|type|enum|abstract\s+class)\s+([A-Za-z_$][\w$]*)",
+    re.MULTILINE)
+_DEFAULT_EXPORT_RE = re.compile(r"^\s*export\s+default\b", re.MULTILINE)
+_LIST_EXPORT_RE = re.compile(r"^\s*export\s+(?:type\s+)?\{([^}]*)\}", re.MULTILINE)
+
+
+def extract_exports(source):
+    """Returns the names exported by a TS/TSX module ("default" for a default export), in order."""
+    names = []
+    for default, name in _DECLARATION_EXPORT_RE.findall(source):
+        names.append(name)
+        if default:
+            names.append("default")
+    for group in _LIST_EXPORT_RE.findall(source):
+        for item in group.split(","):
+            item = item.strip()
+            if item:
+                names.append(item.split(" as ")[-1].strip())
+    if _DEFAULT_EXPORT_RE.search(source):
+        names.append("default")
+    return list(dict.fromkeys(names))
+
+
+class ProjectIndex:
     """
-    Scans a directory and creates a text-based tree structure.
-    Ignores common, noisy directories like node_modules.
+    Per-file metadata of a project tree (size, mtime, sha256 and, for TS/TSX modules, the
+    exported names), built with `os.scandir`. `refresh()` re-reads only files whose size
+    or mtime changed; the index is persisted under `.frontend_agent/` in the project so a
+    later process starts warm. Ignored directories are never entered.
     """
-    tree = []
-    ignore_dirs = {'node_modules', '.git', 'dist', '.vscode', '__pycache__'}
 
-    for root, dirs, files in os.walk(root_dir):
-        # Modify dirs in-place to prevent walking into ignored directories
-        dirs[:] = [d for d in dirs if d not in ignore_dirs]
+    def __init__(self, root, ignore_dirs=IGNORE_DIRS, persist=True, max_entries=MAX_ENTRIES):
+        self.root = os.path.abspath(root)
+        self.ignore_dirs = set(ignore_dirs)
+        self.persist = persist
+        self.max_entries = max_entries
+        self.files = {}
+        self.dirs = set()
+        self.truncated = False
+        self._lock = threading.Lock()
+        if persist:
+            self._load()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.root, INDEX_DIR, INDEX_FILE)
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION:
+            self.files = data.get("files", {})
+
+    def _save(self):
+        path = self.index_path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _describe(path, stat):
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": None, "exports": None}
+        if stat.st_size > MAX_HASH_BYTES:
+            return entry
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return entry
+        entry["sha256"] = hashlib.sha256(data).hexdigest()
+        if path.endswith(SOURCE_EXTENSIONS):
+            entry["exports"] = extract_exports(data.decode("utf-8", errors="replace"))
+        return entry
+
+    def refresh(self):
+        """Brings the index up to date with the disk. Returns {"added", "modified", "removed"} paths."""
+        with self._lock:
+            if not os.path.isdir(self.root):
+                changes = {"added": [], "modified": [], "removed": sorted(self.files)}
+                self.files, self.dirs = {}, set()
+                return changes
+            files, dirs = {}, set()
+            changes = {"added": [], "modified": [], "removed": []}
+            self.truncated = False
+            stack = [""]
+            while stack:
+                rel_dir = stack.pop()
+                try:
+                    with os.scandir(os.path.join(self.root, rel_dir)) as entries:
+                        entries = list(entries)
+                except OSError:
+                    continue
+                for entry in entries:
+                    if len(files) + len(dirs) >= self.max_entries:
+                        self.truncated = True
+                        break
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.ignore_dirs:
+                                dirs.add(rel_path)
+                                stack.append(rel_path)
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    cached = self.files.get(rel_path)
+                    if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+                        files[rel_path] = cached
+                        continue
+                    files[rel_path] = self._describe(entry.path, stat)
+                    changes["modified" if cached else "added"].append(rel_path)
+            changes["removed"] = sorted(self.files.keys() - files.keys())
+            self.files, self.dirs = files, dirs
+            if self.persist and (changes["added"] or changes["modified"] or changes["removed"]
+                                 or not os.path.exists(self.index_path)):
+                try:
+                    self._save()
+                except OSError as e:
+                    print(f"Warning: could not save project index: {e}")
+            return changes
+
+    def render_tree(self, subdir="", max_depth=None, max_entries=200, token_budget=None, show_exports=True):
+        """
+        Renders the files under `subdir` as an indented tree, listing the exports of TS/TSX
+        modules. Directories deeper than `max_depth` are collapsed to a file count, and the
+        output stops after `max_entries` lines or `token_budget` estimated tokens.
+        """
+        prefix = f"{subdir.strip('/')}/" if subdir else ""
+        tree = {}
+        for path in self.files:
+            if path.startswith(prefix):
+                node = tree
+                *parents, name = path[len(prefix):].split("/")
+                for part in parents:
+                    node = node.setdefault(part + "/", {})
+                node[name] = None
+        for path in self.dirs:
+            if path.startswith(prefix):
+                node = tree
+                for part in path[len(prefix):].split("/"):
+                    node = node.setdefault(part + "/", {})
 
-        level = root.replace(root_dir, '').count(os.sep)
-        indent = ' ' * 4 * level
-        tree.append(f"{indent}📂 {os.path.basename(root)}/")
+        label = os.path.basename(subdir.rstrip("/")) if subdir else os.path.basename(self.root)
+        lines = [f"📂 {label}/"]
+        used = estimate_tokens(lines[0])
+        omitted = 0
 
-        sub_indent = ' ' * 4 * (level + 1)
-        for f in files:
-            tree.append(f"{sub_indent}📄 {f}")
+        def count_files(node):
+            return sum(1 if child is None else count_files(child) for child in node.values())
 
-    return "\n".join(tree)
+        def walk(node, rel, depth):
+            nonlocal used, omitted
+            # Directories first, then files, both alphabetically.
+            for name in sorted(node, key=lambda n: (node[n] is None, n.lower())):
+                child = node[name]
+                indent = " " * 4 * depth
+                if child is None:
+                    exports = self.files[prefix + rel + name].get("exports") if show_exports else None
+                    line = f"{indent}📄 {name}" + (f" — exports: {', '.join(exports)}" if exports else "")
+                elif max_depth is not None and depth >= max_depth:
+                    line = f"{indent}📂 {name} ({count_files(child)} files)"
+                else:
+                    line = f"{indent}📂 {name}"
+                cost = estimate_tokens(line) + 1
+                if len(lines) >= max_entries or (token_budget and used + cost > token_budget):
+                    omitted += 1 if child is None else max(1, count_files(child))
+                    continue
+                lines.append(line)
+                used += cost
+                if child is not None and (max_depth is None or depth < max_depth):
+                    walk(child, rel + name, depth + 1)
+
+        walk(tree, "", 1)
+        if omitted or self.truncated:
+            lines.append(f"    … {omitted} more entries not shown" if omitted else "    … (scan limit reached)")
+        return "\n".join(lines)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_project_index(root):
+    """Returns the shared, freshly refreshed index of the project at `root`."""
+    key = os.path.abspath(root)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = ProjectIndex(key)
+    index.refresh()
+    return index
+
+
+def read_directory_structure(root_dir: str) -> str:
+    """
+    Scans a directory and creates a text-based tree structure.
+    Ignores common, noisy directories like node_modules.
+    """
+    index = ProjectIndex(root_dir, persist=False)
+    index.refresh()
+    return index.render_tree(show_exports=False, max_entries=MAX_ENTRIES)
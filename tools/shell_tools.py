@@ -1,27 +1,341 @@
 # tools/shell_tools.py
-import subprocess
+import collections
 import os
+import queue
+import shlex
+import signal
+import subprocess
+import threading
+import time
+import config
+from services.tracing import span
+
+# Longer lines (minified output, progress bars without newlines) are split at this size.
+MAX_LINE_BYTES = 8192
+READ_CHUNK_BYTES = 65536
+# Seconds between SIGTERM and SIGKILL when a command's process group is stopped.
+KILL_GRACE_SECONDS = 5
+POLL_INTERVAL = 0.1
+# How long output is still read after the command exits. A background process it started
+# (`server &`) can keep the pipes open indefinitely, so EOF is not waited for.
+DRAIN_GRACE_SECONDS = 1.0
+
+
+class CommandResult:
+    """
+    Outcome of a shell command. `stdout`/`stderr` hold only the last `max_output_bytes`
+    of each stream (`truncated` says whether anything was dropped); `timed_out` is
+    None, "wall" or "idle"; `error` is set when the command could not be started.
+    """
+
+    def __init__(self, command, cwd, exit_code=None, duration=0.0, stdout="", stderr="",
+                 timed_out=None, truncated=False, error=None):
+        self.command = command
+        self.cwd = cwd
+        self.exit_code = exit_code
+        self.duration = duration
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+        self.truncated = truncated
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None and self.timed_out is None and self.exit_code == 0
+
+    def __str__(self):
+        if self.error:
+            return f"Error: {self.error}"
+        output = f"STDOUT:\n{self.stdout}\n"
+        if self.stderr:
+            output += f"STDERR:\n{self.stderr}\n"
+        if self.truncated:
+            output = "(output truncated to the last lines)\n" + output
+        if self.timed_out:
+            reason = "produced no output for too long" if self.timed_out == "idle" else "ran too long"
+            return f"Error: Command '{self.command}' {reason} and was killed after {self.duration:.1f}s.\n{output}"
+        if self.exit_code != 0:
+            return f"Error executing command '{self.command}'. Return code: {self.exit_code}\n{output}"
+        return f"Command '{self.command}' executed successfully in {self.duration:.1f}s.\n{output}"
+
+
+class _TailBuffer:
+    """Keeps the most recent lines of a stream, at most `max_bytes` of them."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.lines = collections.deque()
+        self.size = 0
+        self.truncated = False
+
+    def append(self, line):
+        self.lines.append(line)
+        self.size += len(line)
+        while self.size > self.max_bytes and len(self.lines) > 1:
+            self.size -= len(self.lines.popleft())
+            self.truncated = True
+
+    def text(self):
+        return "".join(self.lines)
+
+
+class _CommandRun:
+    """
+    Line splitting, tail buffers and timeout bookkeeping shared by `run_command` and
+    `arun_command`. Not thread-safe: only the caller's thread touches it.
+    """
+
+    def __init__(self, command, cwd, timeout, idle_timeout, on_line, max_output_bytes):
+        self.command = command
+        self.cwd = cwd
+        self.on_line = on_line
+        self.buffers = {"stdout": _TailBuffer(max_output_bytes), "stderr": _TailBuffer(max_output_bytes)}
+        self.pending = {"stdout": b"", "stderr": b""}
+        self.started = time.monotonic()
+        self.last_activity = self.started
+        self.deadline = self.started + timeout if timeout else None
+        self.idle_timeout = idle_timeout
+        self.timed_out = None
+
+    def feed(self, stream, chunk):
+        """Adds raw bytes from `stream`; an empty chunk means end of stream."""
+        self.last_activity = time.monotonic()
+        data = self.pending[stream] + chunk
+        lines = data.splitlines(keepends=True)
+        rest = b""
+        if chunk and lines and not lines[-1].endswith((b"\n", b"\r")):
+            rest = lines.pop()
+        while len(rest) > MAX_LINE_BYTES:
+            lines.append(rest[:MAX_LINE_BYTES])
+            rest = rest[MAX_LINE_BYTES:]
+        self.pending[stream] = rest
+        for raw in lines:
+            line = raw.decode("utf-8", errors="replace")
+            self.buffers[stream].append(line)
+            if self.on_line:
+                self.on_line(stream, line.rstrip("\r\n"))
+
+    def flush(self):
+        """Emits partial last lines of streams that are abandoned before their end."""
+        for stream in self.pending:
+            if self.pending[stream]:
+                self.feed(stream, b"")
+
+    def check_timeouts(self):
+        """Returns "wall" or "idle" once a limit has been exceeded, otherwise None."""
+        now = time.monotonic()
+        if self.deadline and now > self.deadline:
+            self.timed_out = "wall"
+        elif self.idle_timeout and now - self.last_activity > self.idle_timeout:
+            self.timed_out = "idle"
+        return self.timed_out
+
+    def result(self, exit_code):
+        return CommandResult(
+            self.command, self.cwd, exit_code=exit_code, duration=time.monotonic() - self.started,
+            stdout=self.buffers["stdout"].text(), stderr=self.buffers["stderr"].text(),
+            timed_out=self.timed_out, truncated=any(b.truncated for b in self.buffers.values()))
+
+
+def _command_label(command):
+    return command if isinstance(command, str) else shlex.join(command)
+
+
+def _popen_kwargs(command):
+    # A new session makes the command its own process group, so timeouts can stop
+    # everything it started (pnpm -> node -> esbuild ...), not just the shell.
+    return {"shell": isinstance(command, str), "start_new_session": os.name == "posix"}
+
+
+def _signal_group(process, sig):
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, sig)
+        elif sig == getattr(signal, "SIGKILL", None):
+            process.kill()
+        else:
+            process.terminate()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def stop_process_group(process, grace=KILL_GRACE_SECONDS):
+    """Sends SIGTERM to the process group started with `start_new_session`, then SIGKILL after `grace` seconds."""
+    _signal_group(process, signal.SIGTERM)
+    try:
+        process.wait(grace)
+    except subprocess.TimeoutExpired:
+        _signal_group(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+        process.wait()
+
+
+def _check_cwd(command, cwd):
+    if not os.path.isdir(cwd):
+        return CommandResult(_command_label(command), cwd,
+                             error=f"Working directory '{cwd}' does not exist. Cannot run command.")
+    return None
+
+
+def _read_stream(name, stream, lines):
+    """Reader thread: forwards raw chunks of `stream` to the caller's thread."""
+    try:
+        for chunk in iter(lambda: stream.read1(READ_CHUNK_BYTES), b""):
+            lines.put((name, chunk))
+    except (OSError, ValueError):
+        pass
+    finally:
+        lines.put((name, b""))
+
+
+def run_command(command, cwd=".", timeout=None, idle_timeout=None, on_line=None, max_output_bytes=None):
+    """
+    Runs `command` (a shell string or an argv list) and returns a CommandResult.
+    Output is read incrementally; `on_line(stream, line)` is called on the caller's
+    thread for every line as it arrives, and only the tail of each stream is kept.
+    The whole process group is killed when the command runs longer than `timeout`
+    or prints nothing for `idle_timeout` seconds (defaults from config; 0 disables).
+    Output is read for at most DRAIN_GRACE_SECONDS after the command exits, so a
+    background process it leaves running does not hold up the result.
+    """
+    timeout = config.SHELL_TIMEOUT if timeout is None else timeout
+    idle_timeout = config.SHELL_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+    max_output_bytes = max_output_bytes or config.SHELL_OUTPUT_TAIL_BYTES
+    label = _command_label(command)
+    invalid = _check_cwd(command, cwd)
+    if invalid:
+        return invalid
+
+    print(f"Executing command: `{label}` in directory: `{cwd}`")
+    with span("shell", category="shell", command=label[:200]) as trace:
+        run = _CommandRun(label, cwd, timeout, idle_timeout, on_line, max_output_bytes)
+        try:
+            process = subprocess.Popen(command, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE, **_popen_kwargs(command))
+        except OSError as e:
+            return CommandResult(label, cwd, error=f"Failed to start command '{label}': {e}")
+
+        chunks = queue.Queue()
+        readers = [threading.Thread(target=_read_stream, args=(name, stream, chunks), daemon=True)
+                   for name, stream in (("stdout", process.stdout), ("stderr", process.stderr))]
+        for reader in readers:
+            reader.start()
+        open_streams = 2
+        exited_at = None
+        while open_streams or process.poll() is None:
+            if run.check_timeouts():
+                break
+            if exited_at is None and process.poll() is not None:
+                exited_at = time.monotonic()
+            if exited_at is not None and time.monotonic() - exited_at > DRAIN_GRACE_SECONDS:
+                print(f"`{label}` exited but a background process still holds its output; not waiting for it.")
+                while not chunks.empty():
+                    run.feed(*chunks.get_nowait())
+                run.flush()
+                break
+            try:
+                name, chunk = chunks.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            run.feed(name, chunk)
+            if not chunk:
+                open_streams -= 1
+
+        if run.timed_out:
+            stop_process_group(process)
+        exit_code = process.wait()
+        for reader, stream in zip(readers, (process.stdout, process.stderr)):
+            # A killed command's grandchildren may still hold the pipe; leave those to the daemon reader.
+            reader.join(POLL_INTERVAL)
+            if not reader.is_alive():
+                stream.close()
+        result = run.result(exit_code)
+        trace.set(exit_code=exit_code, timed_out=result.timed_out, truncated=result.truncated)
+    return result
+
+
+async def arun_command(command, cwd=".", timeout=None, idle_timeout=None, on_line=None, max_output_bytes=None):
+    """
+    asyncio variant of `run_command`, for running several commands at once from one
+    event loop. `on_line` is called on the event loop thread. asyncio only reports the
+    exit once the output pipes are closed, so a background process still holding them
+    DRAIN_GRACE_SECONDS after the command exits is stopped with its process group.
+    """
+    import asyncio  # only callers already running an event loop pay for the import
+    timeout = config.SHELL_TIMEOUT if timeout is None else timeout
+    idle_timeout = config.SHELL_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+    max_output_bytes = max_output_bytes or config.SHELL_OUTPUT_TAIL_BYTES
+    label = _command_label(command)
+    invalid = _check_cwd(command, cwd)
+    if invalid:
+        return invalid
+
+    print(f"Executing command: `{label}` in directory: `{cwd}`")
+    with span("shell", category="shell", command=label[:200]) as trace:
+        run = _CommandRun(label, cwd, timeout, idle_timeout, on_line, max_output_bytes)
+        kwargs = dict(cwd=cwd, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+                      stderr=asyncio.subprocess.PIPE, start_new_session=os.name == "posix")
+        try:
+            if isinstance(command, str):
+                process = await asyncio.create_subprocess_shell(command, **kwargs)
+            else:
+                process = await asyncio.create_subprocess_exec(*command, **kwargs)
+        except OSError as e:
+            return CommandResult(label, cwd, error=f"Failed to start command '{label}': {e}")
+
+        async def pump(name, stream):
+            while True:
+                chunk = await stream.read(READ_CHUNK_BYTES)
+                run.feed(name, chunk)
+                if not chunk:
+                    return
+
+        pumps = asyncio.gather(pump("stdout", process.stdout), pump("stderr", process.stderr))
+        waiter = asyncio.ensure_future(process.wait())
+        lingering = False
+        exited_at = None
+        while not (pumps.done() and waiter.done()):
+            if run.check_timeouts():
+                break
+            if exited_at is None and process.returncode is not None:
+                exited_at = time.monotonic()
+            if exited_at is not None and time.monotonic() - exited_at > DRAIN_GRACE_SECONDS:
+                print(f"`{label}` exited but a background process still holds its output; stopping its process group.")
+                lingering = True
+                break
+            await asyncio.wait({pumps, waiter}, timeout=POLL_INTERVAL, return_when=asyncio.ALL_COMPLETED)
+
+        if run.timed_out or lingering:
+            # wait() only returns once the pipes are closed, so whatever still holds them is stopped as well.
+            for sig in (signal.SIGTERM, getattr(signal, "SIGKILL", signal.SIGTERM)):
+                _signal_group(process, sig)
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter), KILL_GRACE_SECONDS)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+        if waiter.done():
+            exit_code = waiter.result()
+        else:
+            # Only a process that left the group can still hold the pipes; stop waiting for it.
+            waiter.cancel()
+            pumps.cancel()
+            exit_code = process.returncode
+        try:
+            await pumps
+        except asyncio.CancelledError:
+            pass
+        run.flush()
+        result = run.result(exit_code)
+        trace.set(exit_code=exit_code, timed_out=result.timed_out, truncated=result.truncated)
+    return result
 
 
 def execute_shell_command(command: str, cwd_override: str = None) -> str:
     """Executes a shell command in a specified directory or the project root."""
     working_dir = cwd_override if cwd_override else "."
-
-    if not os.path.exists(working_dir):
-        return f"Error: Working directory '{working_dir}' does not exist. Cannot run command."
-
     try:
-        print(f"Executing command: `{command}` in directory: `{working_dir}`")
-        result = subprocess.run(
-            command, shell=True, check=True, cwd=working_dir,
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-        )
-        output = f"STDOUT:\n{result.stdout}\n"
-        if result.stderr:
-            output += f"STDERR:\n{result.stderr}\n"
-        return f"Command '{command}' executed successfully.\n{output}"
-    except subprocess.CalledProcessError as e:
-        return f"Error executing command '{command}'. Return code: {e.returncode}\nSTDOUT:\n{e.stdout}\nSTDERR:\n{e.stderr}"
+        return str(run_command(command, cwd=working_dir))
     except Exception as e:
         return f"An unexpected error occurred: {e}"
 
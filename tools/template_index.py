@@ -0,0 +1,203 @@
+# tools/template_index.py
+import os
+import re
+import threading
+import config
+
+# Sections every call of a role receives (if the budget allows), in priority order.
+CORE_SECTIONS = {
+    "planner": [
+        "Plan Structure Format",
+        "Directory Structure",
+        "File Naming Conventions",
+        "Installing Components",
+    ],
+    "component": [
+        "Component File Structure",
+        "Import Order (CRITICAL - Follow this exact order):",
+        "Path Aliases",
+        "Global CSS Import",
+        "Component Usage",
+        "Tailwind CSS Usage",
+        "Interface Definitions",
+    ],
+}
+
+# Concepts a section covers beyond the words in its own heading. A section is offered to
+# a component call when these appear in the component's file path or description.
+SECTION_CONCEPTS = {
+    "Customization": ["button", "variant", "style", "theme", "custom", "conditional"],
+    "CSS Variables (Design Tokens)": ["theme", "color", "colors", "dark", "light", "palette", "retro", "brand"],
+    "Type Exports": ["type", "types", "model", "interface"],
+    "React Hooks Pattern": ["state", "hook", "hooks", "toggle", "counter", "interactive", "typing", "use"],
+    "Form Handling": ["form", "input", "field", "submit", "contact", "signup", "login", "newsletter", "search", "subscribe"],
+    "Component Error Boundaries": ["error", "fallback"],
+    "API Error Handling": ["api", "fetch", "request", "load", "loading", "async", "data"],
+    "Component Optimization": ["list", "gallery", "grid", "table", "expensive", "memo", "items", "projects"],
+    "Lazy Loading": ["lazy", "suspense", "route", "routing", "page", "pages", "modal"],
+    "ARIA Attributes": ["button", "dialog", "modal", "menu", "toggle", "icon", "dropdown", "accordion", "tabs"],
+    "Semantic HTML": ["nav", "navigation", "navbar", "header", "footer", "section", "hero", "main", "layout", "sidebar", "landing"],
+    "Component Testing Structure": ["test", "tests", "testing"],
+    "Comments and Documentation": ["docs", "documentation", "jsdoc"],
+    "Environment Variables": ["env", "environment", "config", "api"],
+    "Framer Motion Integration": ["animation", "animations", "animate", "animated", "motion", "framer", "fade", "slide", "typing"],
+    "CSS Animations": ["animation", "animations", "animate", "hover", "pulse", "transition", "blink", "typing"],
+    "Summary Checklist": ["checklist"],
+}
+
+# Heading words too generic to signal relevance (every file path contains "components/").
+STOP_WORDS = {"and", "the", "for", "with", "use", "of", "to", "in", "critical", "follow", "this", "exact", "order",
+              "component", "components", "conventions", "guidelines", "structure", "integration", "usage",
+              "best", "practices", "rules", "management", "file", "files", "tsx"}
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) used for context budgeting."""
+    return (len(text) + 3) // 4
+
+
+def _words(text):
+    return set(re.findall(r"[a-z][a-z0-9]+", text.lower()))
+
+
+class TemplateSection:
+    def __init__(self, title, parent, level, body, order):
+        self.title = title
+        self.parent = parent
+        self.level = level
+        self.body = body.strip()
+        self.order = order
+        heading_words = _words(title) - STOP_WORDS
+        if parent:
+            heading_words |= _words(re.sub(r"^\d+\.\s*", "", parent)) - STOP_WORDS
+        self.concepts = heading_words | set(SECTION_CONCEPTS.get(title, []))
+        self.tokens = estimate_tokens(self.render())
+
+    def render(self):
+        hashes = "#" * self.level
+        return f"{hashes} {self.title}\n\n{self.body}"
+
+
+class ContextSelection:
+    """The sections chosen for one call, with enough detail to audit the choice."""
+
+    def __init__(self, sections, total_tokens):
+        self.sections = sections
+        self.total_tokens = total_tokens
+        self.tokens = sum(s.tokens for s in sections)
+
+    @property
+    def titles(self):
+        return [s.title for s in self.sections]
+
+    @property
+    def text(self):
+        parts, current_parent = [], None
+        for section in self.sections:
+            if section.parent and section.parent != current_parent:
+                parts.append(f"## {section.parent}")
+            current_parent = section.parent
+            parts.append(section.render())
+        return "\n\n".join(parts)
+
+    def summary(self):
+        return f"{len(self.sections)} template section(s), ~{self.tokens} of ~{self.total_tokens} tokens: " + \
+            ", ".join(self.titles)
+
+
+class TemplateIndex:
+    """
+    `template_context.md` parsed once into sections (`##` sections without subsections,
+    and `###` subsections under their `##` parent), each tagged with the concepts it
+    covers, so every call can be given just the guidance it needs.
+    """
+
+    def __init__(self, text):
+        self.preamble, self.sections = self._parse(text)
+        self.total_tokens = estimate_tokens(text)
+        self.by_title = {s.title: s for s in self.sections}
+
+    @staticmethod
+    def _parse(text):
+        preamble, sections = [], []
+        parent, title, level, body = None, None, 0, []
+        in_fence = False
+
+        def flush():
+            if title is not None:
+                sections.append(TemplateSection(title, parent if level == 3 else None,
+                                                level, "\n".join(body), len(sections)))
+
+        for line in text.splitlines():
+            if line.startswith("```"):
+                in_fence = not in_fence
+            heading = None if in_fence else re.match(r"^(#{2,3})\s+(.*)$", line)
+            if heading:
+                flush()
+                level, name = len(heading.group(1)), heading.group(2).strip()
+                if level == 2:
+                    parent = name
+                title, body = re.sub(r"^\d+\.\s*", "", name) if level == 2 else name, []
+                continue
+            if title is None:
+                if not line.startswith("# "):
+                    preamble.append(line)
+            else:
+                body.append(line)
+        flush()
+        # A `##` heading immediately followed by `###` subsections carries no guidance of its own.
+        sections = [s for s in sections if s.body or s.level == 3]
+        return "\n".join(preamble).strip(), sections
+
+    def select(self, role="component", file_path="", description="", token_budget=None):
+        """
+        Picks the sections for one call: the role's core sections first, then sections whose
+        concepts match the file path or description (most matches first), until the token
+        budget is spent. Sections are returned in document order.
+        """
+        budget = config.TEMPLATE_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+        query = _words(re.sub(r"([a-z])([A-Z])", r"\1 \2", f"{file_path} {description}"))
+
+        candidates = [self.by_title[t] for t in CORE_SECTIONS.get(role, []) if t in self.by_title]
+        core = set(id(s) for s in candidates)
+        scored = []
+        for section in self.sections:
+            if id(section) in core or section.title == "Plan Structure Format":
+                continue
+            score = len(section.concepts & query)
+            if score:
+                scored.append((-score, section.order, section))
+        candidates += [s for _, _, s in sorted(scored, key=lambda item: item[:2])]
+
+        chosen, used = [], estimate_tokens(self.preamble)
+        for section in candidates:
+            if used + section.tokens > budget and chosen:
+                continue
+            chosen.append(section)
+            used += section.tokens
+        chosen.sort(key=lambda s: s.order)
+        return ContextSelection(chosen, self.total_tokens)
+
+    def render(self, selection):
+        return f"{self.preamble}\n\n{selection.text}" if self.preamble else selection.text
+
+
+_index = None
+_index_key = None
+_index_lock = threading.Lock()
+
+
+def get_template_index(path="template_context.md"):
+    """Returns the parsed index of `path`, reparsing only when the file changes."""
+    global _index, _index_key
+    try:
+        key = (os.path.abspath(path), os.path.getmtime(path))
+    except OSError:
+        print(f"Warning: {path} not found.")
+        return TemplateIndex("")
+    with _index_lock:
+        if _index_key != key:
+            with open(path, "r", encoding="utf-8") as f:
+                _index = TemplateIndex(f.read())
+            _index_key = key
+        return _index
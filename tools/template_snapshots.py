@@ -0,0 +1,275 @@
+# tools/template_snapshots.py
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+import config
+from tools.shell_tools import run_command
+
+META_FILE = ".snapshot.json"
+LOCKFILE = "pnpm-lock.yaml"
+# Hard-linked subtrees and the nesting depth below which files are still copied: the top two
+# levels of node_modules are pnpm bookkeeping (.modules.yaml, .pnpm/lock.yaml, .bin shims)
+# that pnpm may rewrite in place, while package contents and git objects are immutable.
+LINKED_DIRS = {"node_modules": 2, os.path.join(".git", "objects"): 0}
+
+
+def _run(command, cwd):
+    """Runs `command` (an argv list) and returns (ok, output tail)."""
+    result = run_command(command, cwd=cwd)
+    return result.ok, (result.stdout + result.stderr) if result.ok else str(result)
+
+
+def _file_sha256(path):
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _slug(repo_url):
+    name = re.sub(r"\.git$", "", repo_url.rstrip("/")).split("/")[-1]
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name) or "template"
+
+
+class TemplateSnapshotStore:
+    """
+    Keeps one cloned and `pnpm install`-ed copy of each base repository per commit,
+    and creates new workspaces from it. Heavy, immutable trees (package contents in
+    `node_modules`, git objects) are hard-linked into the workspace; everything else
+    is copied so edits in a workspace never leak back into the snapshot.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or config.TEMPLATE_SNAPSHOT_DIR
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def resolve_commit(self, repo_url):
+        """Returns the commit the remote's HEAD points to, or None if the remote is unreachable."""
+        ok, output = _run(["git", "ls-remote", repo_url, "HEAD"], cwd=".")
+        match = re.match(r"^([0-9a-f]{40})\s", output) if ok else None
+        return match.group(1) if match else None
+
+    def snapshot_path(self, repo_url, commit):
+        url_hash = hashlib.sha256(repo_url.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.root, f"{_slug(repo_url)}-{url_hash}-{commit[:12]}")
+
+    @staticmethod
+    def read_meta(snapshot_dir):
+        try:
+            with open(os.path.join(snapshot_dir, META_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_meta(snapshot_dir, meta):
+        path = os.path.join(snapshot_dir, META_FILE)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def is_valid(self, snapshot_dir):
+        """A snapshot is valid while its lockfile still matches the one it was installed from."""
+        meta = self.read_meta(snapshot_dir)
+        return bool(meta) and meta.get("lockfile_sha256") == _file_sha256(os.path.join(snapshot_dir, LOCKFILE))
+
+    def list_snapshots(self):
+        if not os.path.isdir(self.root):
+            return []
+        snapshots = []
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            meta = self.read_meta(path)
+            if meta:
+                snapshots.append(dict(meta, path=path, valid=self.is_valid(path)))
+        return snapshots
+
+    def _latest_for(self, repo_url):
+        candidates = [s for s in self.list_snapshots() if s["repo_url"] == repo_url and s["valid"]]
+        return max(candidates, key=lambda s: s["created"], default=None)
+
+    def ensure_snapshot(self, repo_url):
+        """
+        Returns the path of a ready snapshot of `repo_url`'s current HEAD, building it
+        (clone + install) if needed. When the remote can't be reached, the newest valid
+        snapshot of that repository is used. Returns None on failure.
+        """
+        commit = self.resolve_commit(repo_url)
+        if commit is None:
+            latest = self._latest_for(repo_url)
+            if latest:
+                print(f"Could not reach {repo_url}; using snapshot at commit {latest['commit'][:12]}.")
+                return latest["path"]
+            print(f"Could not resolve HEAD of {repo_url} and no snapshot exists.")
+            return None
+
+        path = self.snapshot_path(repo_url, commit)
+        with self._lock_for(path):
+            if os.path.isdir(path) and self.is_valid(path):
+                return path
+            if os.path.isdir(path):
+                print(f"Snapshot {path} lockfile changed since install; rebuilding.")
+                shutil.rmtree(path, ignore_errors=True)
+            return self._build_snapshot(repo_url, commit, path)
+
+    def _build_snapshot(self, repo_url, commit, path):
+        os.makedirs(self.root, exist_ok=True)
+        staging = f"{path}.building-{uuid.uuid4().hex[:8]}"
+        try:
+            ok, output = _run(["git", "clone", repo_url, staging], cwd=".")
+            if ok:
+                ok, output = _run(["git", "checkout", "--quiet", commit], cwd=staging)
+            if ok:
+                ok, output = _run(["pnpm", "install", "--frozen-lockfile"], cwd=staging)
+                if not ok:
+                    ok, output = _run(["pnpm", "install"], cwd=staging)
+            if not ok:
+                print(f"Error building template snapshot for {repo_url}:\n{output}")
+                return None
+            self._write_meta(staging, {
+                "repo_url": repo_url,
+                "commit": commit,
+                "lockfile_sha256": _file_sha256(os.path.join(staging, LOCKFILE)),
+                "created": time.time(),
+            })
+            os.replace(staging, path)
+            print(f"Created template snapshot {path}")
+            return path
+        finally:
+            if os.path.isdir(staging):
+                shutil.rmtree(staging, ignore_errors=True)
+
+    @staticmethod
+    def _should_link(rel_path):
+        for linked, min_depth in LINKED_DIRS.items():
+            if rel_path.startswith(linked + os.sep):
+                return rel_path[len(linked) + 1:].count(os.sep) >= min_depth
+        return False
+
+    def _copy_tree(self, src, dest):
+        linked = copied = 0
+        for root, dirs, files in os.walk(src):
+            rel_root = os.path.relpath(root, src)
+            target_root = os.path.join(dest, rel_root) if rel_root != "." else dest
+            os.makedirs(target_root, exist_ok=True)
+            for name in dirs + files:
+                source = os.path.join(root, name)
+                target = os.path.join(target_root, name)
+                if os.path.islink(source):
+                    os.symlink(os.readlink(source), target)
+                    if name in dirs:
+                        dirs.remove(name)
+                    continue
+                if name in dirs:
+                    continue
+                rel_path = os.path.join(rel_root, name) if rel_root != "." else name
+                if rel_path == META_FILE or rel_path.startswith(META_FILE + "."):
+                    continue
+                if self._should_link(rel_path):
+                    try:
+                        os.link(source, target)
+                        linked += 1
+                        continue
+                    except OSError:
+                        pass  # e.g. cross-device; fall back to a copy
+                shutil.copy2(source, target)
+                copied += 1
+        return linked, copied
+
+    def create_workspace(self, repo_url, dest):
+        """Materializes a fresh workspace for `repo_url` at `dest`. Returns True on success."""
+        snapshot = self.ensure_snapshot(repo_url)
+        if snapshot is None:
+            return False
+        started = time.perf_counter()
+        try:
+            linked, copied = self._copy_tree(snapshot, dest)
+        except OSError as e:
+            print(f"Error creating workspace from snapshot {snapshot}: {e}")
+            return False
+        meta = self.read_meta(snapshot)
+        meta["last_used"] = time.time()
+        self._write_meta(snapshot, meta)
+        print(f"Workspace '{dest}' created from snapshot in {time.perf_counter() - started:.2f}s "
+              f"({linked} files hard-linked, {copied} copied).")
+        return True
+
+    def prune(self, max_age=None, keep=1):
+        """
+        Removes invalid snapshots, snapshots unused for `max_age` seconds, and all but the
+        `keep` newest snapshots of each repository. Returns the removed paths.
+        """
+        removed = []
+        by_repo = {}
+        now = time.time()
+        for snapshot in self.list_snapshots():
+            last_used = snapshot.get("last_used", snapshot["created"])
+            if not snapshot["valid"] or (max_age and now - last_used > max_age):
+                removed.append(snapshot["path"])
+            else:
+                by_repo.setdefault(snapshot["repo_url"], []).append(snapshot)
+        for snapshots in by_repo.values():
+            snapshots.sort(key=lambda s: s["created"], reverse=True)
+            removed.extend(s["path"] for s in snapshots[keep:])
+        for path in removed:
+            shutil.rmtree(path, ignore_errors=True)
+        return removed
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store():
+    """Returns the process-wide TemplateSnapshotStore, so concurrent builds share its per-snapshot locks."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TemplateSnapshotStore()
+        return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage warm template snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    warm = sub.add_parser("warm", help="Clone and install a base repository ahead of time.")
+    warm.add_argument("repo_urls", nargs="+")
+    prune = sub.add_parser("prune", help="Delete stale or superseded snapshots.")
+    prune.add_argument("--max-age-days", type=float, default=None)
+    prune.add_argument("--keep", type=int, default=1,
+                       help="Snapshots to keep per repository (default: 1).")
+    sub.add_parser("list", help="Show existing snapshots.")
+    args = parser.parse_args(argv)
+
+    store = TemplateSnapshotStore()
+    if args.command == "warm":
+        failed = [url for url in args.repo_urls if not store.ensure_snapshot(url)]
+        return 1 if failed else 0
+    if args.command == "prune":
+        max_age = args.max_age_days * 24 * 3600 if args.max_age_days is not None else None
+        for path in store.prune(max_age=max_age, keep=args.keep):
+            print(f"Removed {path}")
+        return 0
+    for snapshot in store.list_snapshots():
+        status = "valid" if snapshot["valid"] else "stale"
+        print(f"{snapshot['path']}  {snapshot['repo_url']}@{snapshot['commit'][:12]}  {status}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+# tools/type_checker.py
+import os
+import re
+from tools.shell_tools import run_command
+
+# tsc keeps its incremental state here, so later rounds and rebuilds only re-check what changed.
+BUILD_INFO_FILE = os.path.join(".frontend_agent", "tsc.tsbuildinfo")
+TSC_COMMAND = ["pnpm", "exec", "tsc", "--noEmit", "--incremental", "--tsBuildInfoFile", BUILD_INFO_FILE,
+               "--pretty", "false", "-p", "tsconfig.json"]
+# `src/App.tsx(12,5): error TS2322: Type 'string' is not assignable to type 'number'.`
+DIAGNOSTIC_RE = re.compile(r"^(?P<file>.+?)\((?P<line>\d+),(?P<col>\d+)\): error (?P<code>TS\d+): (?P<message>.*)$")
+GLOBAL_DIAGNOSTIC_RE = re.compile(r"^error (?P<code>TS\d+): (?P<message>.*)$")
+
+
+class TypeCheckResult:
+    """
+    Diagnostics of one type-check pass. `diagnostics` maps project-relative file paths
+    (forward slashes) to "line:col TSxxxx message" strings; errors not tied to a file are
+    in `global_errors`. `error` is set when the checker itself could not run.
+    """
+
+    def __init__(self, diagnostics=None, global_errors=None, duration=0.0, error=None):
+        self.diagnostics = diagnostics or {}
+        self.global_errors = global_errors or []
+        self.duration = duration
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None and not self.diagnostics and not self.global_errors
+
+    @property
+    def error_count(self):
+        return sum(len(d) for d in self.diagnostics.values()) + len(self.global_errors)
+
+
+def parse_diagnostics(output, project_path="."):
+    """Groups `tsc --pretty false` output by file. Indented continuation lines join the previous message."""
+    diagnostics, global_errors = {}, []
+    last = None
+    root = os.path.abspath(project_path)
+    for line in output.splitlines():
+        match = DIAGNOSTIC_RE.match(line)
+        if match:
+            file_path = match.group("file").strip()
+            if os.path.isabs(file_path):
+                file_path = os.path.relpath(file_path, root)
+            file_path = file_path.replace("\\", "/")
+            last = diagnostics.setdefault(file_path, [])
+            last.append(f"{match.group('line')}:{match.group('col')} {match.group('code')} {match.group('message')}")
+            continue
+        match = GLOBAL_DIAGNOSTIC_RE.match(line)
+        if match:
+            global_errors.append(f"{match.group('code')} {match.group('message')}")
+            last = global_errors
+        elif line.startswith((" ", "\t")) and last:
+            last[-1] += "\n" + line.rstrip()
+    return diagnostics, global_errors
+
+
+def run_type_check(project_path, on_line=None):
+    """Type-checks the whole project in one `tsc` pass and returns a TypeCheckResult."""
+    os.makedirs(os.path.join(project_path, os.path.dirname(BUILD_INFO_FILE)), exist_ok=True)
+    result = run_command(TSC_COMMAND, cwd=project_path, on_line=on_line)
+    if result.error or result.timed_out:
+        return TypeCheckResult(duration=result.duration, error=str(result))
+    diagnostics, global_errors = parse_diagnostics(result.stdout + result.stderr, project_path)
+    if result.exit_code != 0 and not diagnostics and not global_errors:
+        # tsc missing or crashed: nothing we can attribute to a file.
+        return TypeCheckResult(duration=result.duration, error=str(result))
+    return TypeCheckResult(diagnostics, global_errors, duration=result.duration)